@@ -0,0 +1,112 @@
+"""
+Latency of the sync views under a WSGI server against their async versions under an ASGI
+server, with many concurrent clients.
+
+Start both servers on the same database, e.g.::
+
+    gunicorn copal.wsgi -w 4 -b 127.0.0.1:8000
+    gunicorn copal.asgi -k uvicorn.workers.UvicornWorker -w 4 -b 127.0.0.1:8001
+
+then log in as a user of the right role for the route and run::
+
+    python benchmarks/asgi_vs_wsgi.py --email provider@example.com --password ... \\
+        --route request_list --concurrency 50 --requests 2000
+
+Each server gets the same warm-up and the same number of requests. Prints p50/p95/p99 latency
+(ms) and throughput per server, or JSON with ``--json``.
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+
+# route -> (sync path, async path), relative to the language prefix
+ROUTES = {
+    'client_dashboard': ('client/dashboard/', 'client/dashboard/async/'),
+    'provider_dashboard': ('provider/dashboard/', 'provider/dashboard/async/'),
+    'request_list': ('requests/', 'requests/async/'),
+}
+
+
+def login(base_url, email, password):
+    session = requests.Session()
+    login_url = urljoin(base_url, 'login/')
+    session.get(login_url).raise_for_status()
+    response = session.post(login_url, data={
+        'username': email,
+        'password': password,
+        'csrfmiddlewaretoken': session.cookies['csrftoken'],
+    }, headers={'Referer': login_url}, allow_redirects=False)
+    if response.status_code != 302:
+        raise SystemExit(f'Login failed on {base_url} (HTTP {response.status_code})')
+    return session.cookies.get_dict()
+
+
+def percentile(samples, pct):
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def run(url, cookies, concurrency, total, warmup):
+    def worker(count):
+        session = requests.Session()
+        session.cookies.update(cookies)
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = session.get(url, allow_redirects=False)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise SystemExit(f'{url} returned HTTP {response.status_code}')
+        return timings
+
+    worker(warmup)
+    shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [t for timings in pool.map(worker, shares) for t in timings]
+    elapsed = time.perf_counter() - start
+    return {
+        'url': url,
+        'requests': len(samples),
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+        'requests_per_second': round(len(samples) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000/en/')
+    parser.add_argument('--asgi-url', default='http://127.0.0.1:8001/en/')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--route', choices=sorted(ROUTES), default='request_list')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    sync_path, async_path = ROUTES[args.route]
+    results = {}
+    for server, base_url, path in (('wsgi', args.wsgi_url, sync_path), ('asgi', args.asgi_url, async_path)):
+        cookies = login(base_url, args.email, args.password)
+        results[server] = run(urljoin(base_url, path), cookies, args.concurrency, args.requests, args.warmup)
+
+    if args.json:
+        print(json.dumps({'route': args.route, 'concurrency': args.concurrency, **results}, indent=2))
+        return
+    print(f'{args.route}, {args.concurrency} concurrent clients')
+    print(f'{"server":<8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>10}')
+    for server, result in results.items():
+        print(f'{server:<8}{result["p50_ms"]:>10}{result["p95_ms"]:>10}{result["p99_ms"]:>10}'
+              f'{result["requests_per_second"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Logins per second on one core, through the real login view and password hasher.
+
+Runs in-process against a throwaway test database::
+
+    SECRET_KEY=... python benchmarks/login_throughput.py --logins 20
+
+Reports successful logins/sec, password hashes per login and, for a throttled email,
+rejected attempts/sec. Run it on two commits to compare them.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'copal.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import hashers  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import translation  # noqa: E402
+
+PASSWORD = 'benchmark-pass-123'
+
+
+def timed_logins(client, email, password, count):
+    with mock.patch('django.contrib.auth.base_user.check_password', wraps=hashers.check_password) as check:
+        start = time.perf_counter()
+        for _ in range(count):
+            client.post(reverse('login'), {'username': email, 'password': password})
+            client.cookies.clear()
+        elapsed = time.perf_counter() - start
+    return count / elapsed, check.call_count / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        from domestique.models import Client as ClientUser
+
+        user = ClientUser.objects.create_user(
+            email='bench@example.com', password=PASSWORD, first_name='Bench', last_name='User',
+            phone='600000000', address='Douala', role='CLIENT',
+        )
+        client = Client()
+        with translation.override('en'):
+            rate, hashes = timed_logins(client, user.email, PASSWORD, args.logins)
+            print(f'successful logins: {rate:8.2f}/s  ({hashes:.1f} password hashes per login)')
+
+            cache.clear()
+            rate, hashes = timed_logins(client, user.email, 'wrong', args.logins * 10)
+            print(f'failed burst:      {rate:8.2f}/s  ({hashes:.2f} password hashes per attempt)')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Load baseline for every page in ``domestique/urls.py``: throughput and p50/p95/p99 latency
+per route, with concurrent clients, written as JSON that CI can diff.
+
+Fill a database first, e.g. ``python manage.py generate_data --requests 1000000``, then
+either drive the views in-process through Django's test client::
+
+    SECRET_KEY=... python benchmarks/routes.py --output baseline.json
+
+or a running server on the same database::
+
+    SECRET_KEY=... python benchmarks/routes.py --base-url http://127.0.0.1:8000 --output baseline.json
+
+Each route is requested as the kind of user it is meant for (a client, a provider, an admin
+or nobody), with URL arguments taken from the data: a pending request with a pending
+response, its client and provider, a service. Only GET requests are made: forms and
+confirmation pages are measured, never submitted. ``--compare old.json`` reports the
+routes whose p95 grew by more than ``--tolerance``, that run more queries (from the
+``Server-Timing`` header) or that started failing, and exits with status 1 if there are any.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlencode, urljoin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'copal.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import requests  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import translation  # noqa: E402
+
+from domestique.models import Admin, Request, Response, Service, User  # noqa: E402
+from domestique.synthetic import DEFAULT_PASSWORD, route_kwargs  # noqa: E402
+from domestique.urls import urlpatterns  # noqa: E402
+
+SKIP = {
+    'logout': 'POST only, and would end the session',
+    'event_stream': 'a stream that never ends',
+}
+ANONYMOUS = {'home', 'register', 'login', 'admin_login'}
+CLIENT = {'client_dashboard', 'client_dashboard_async', 'request_create', 'request_accept', 'request_reject'}
+# Everything else starting with admin_ (and metrics) is for admins, the rest for providers.
+QUERY = {
+    'admin_export': lambda: {'since': date.today().isoformat()},
+}
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def role_for(name):
+    if name in ANONYMOUS:
+        return None
+    if name in CLIENT:
+        return 'client'
+    if name.startswith('admin_') or name == 'metrics':
+        return 'admin'
+    return 'provider'
+
+
+def sample_objects():
+    """The rows the routes are requested with."""
+    response = (
+        Response.objects.filter(status='PENDING', request__status='PENDING')
+        .select_related('request', 'request__client', 'provider').first()
+    )
+    if response is None:
+        raise SystemExit('No pending request with a pending response: run generate_data first.')
+    admin = Admin.objects.first() or User.objects.filter(is_superuser=True).first()
+    if admin is None:
+        raise SystemExit('No admin user: run generate_data first.')
+    return {
+        'client': response.request.client,
+        'provider': response.provider,
+        'admin': admin,
+        'request': response.request,
+        'response': response,
+        'service': Service.objects.first(),
+    }
+
+
+def routes(objects, only=None):
+    """Yield ``(name, path, role)`` for every route to measure."""
+    for pattern in urlpatterns:
+        name = pattern.name
+        if only and name not in only or name in SKIP:
+            continue
+        path = reverse(name, kwargs=route_kwargs(pattern, objects))
+        query = QUERY.get(name)
+        if query:
+            path += '?' + urlencode(query())
+        yield name, path, role_for(name)
+
+
+class InProcess:
+    """Requests through Django's test client, in this process."""
+    mode = 'client'
+
+    def __init__(self):
+        setup_test_environment()
+        settings.ALLOWED_HOSTS = ['*']
+        # Broken pages are counted as 500s and every route gets a line in the report; the
+        # tracebacks and slow-request warnings would drown it.
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        logging.getLogger('domestique.metrics').setLevel(logging.ERROR)
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return {key: morsel.value for key, morsel in client.cookies.items()}
+
+    def session(self, cookies):
+        client = Client(raise_request_exception=False)
+        client.cookies.load(cookies or {})
+        return client
+
+    def get(self, client, path):
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, response.get('Server-Timing', '')
+
+    def close(self, client):
+        connections.close_all()
+
+
+class OverHttp:
+    """Requests to a running server."""
+    mode = 'http'
+
+    def __init__(self, base_url, password):
+        self.base_url = base_url
+        self.password = password
+
+    def login(self, user):
+        session = requests.Session()
+        login_url = urljoin(self.base_url, reverse('login'))
+        session.get(login_url).raise_for_status()
+        response = session.post(login_url, data={
+            'username': user.email,
+            'password': self.password,
+            'csrfmiddlewaretoken': session.cookies['csrftoken'],
+        }, headers={'Referer': login_url}, allow_redirects=False)
+        if response.status_code != 302:
+            raise SystemExit(f'Login as {user.email} failed (HTTP {response.status_code})')
+        return session.cookies.get_dict()
+
+    def session(self, cookies):
+        session = requests.Session()
+        session.cookies.update(cookies or {})
+        return session
+
+    def get(self, session, path):
+        response = session.get(urljoin(self.base_url, path), allow_redirects=False)
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+    def close(self, session):
+        session.close()
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def measure(driver, path, cookies, concurrency, total, warmup):
+    def worker(count):
+        session = driver.session(cookies)
+        results = []
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                status, timing = driver.get(session, path)
+                elapsed = (time.perf_counter() - start) * 1000
+                match = QUERIES_RE.search(timing)
+                results.append((elapsed, status, int(match.group(1)) if match else None))
+        finally:
+            driver.close(session)
+        return results
+
+    worker(warmup)
+    shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = [result for batch in pool.map(worker, shares) for result in batch]
+    elapsed = time.perf_counter() - start
+
+    samples = [ms for ms, _, _ in results]
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    queries = [n for _, _, n in results if n is not None]
+    return {
+        'path': path,
+        'requests': len(results),
+        'statuses': statuses,
+        'errors': sum(1 for _, status, _ in results if status >= 400),
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'queries': int(statistics.median(queries)) if queries else None,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Return a line per route that got slower, runs more queries or started failing."""
+    regressions = []
+    for name, result in sorted(current['routes'].items()):
+        old = baseline.get('routes', {}).get(name)
+        if old is None:
+            continue
+        if result['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {old["p95_ms"]} -> {result["p95_ms"]} ms')
+        if old.get('queries') is not None and (result['queries'] or 0) > old['queries']:
+            regressions.append(f'{name}: {old["queries"]} -> {result["queries"]} queries')
+        if result['errors'] and not old['errors']:
+            regressions.append(f'{name}: {result["errors"]} error(s), statuses {result["statuses"]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help='Server to load (default: in-process test client)')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of the sample users (HTTP only)')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--route', action='append', dest='routes', help='Only this route (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', '-o', help='Write the JSON here instead of stdout')
+    parser.add_argument('--compare', help='Baseline JSON to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    driver = OverHttp(args.base_url, args.password) if args.base_url else InProcess()
+    with translation.override(args.language):
+        objects = sample_objects()
+        cookies = {role: driver.login(objects[role]) for role in ('client', 'provider', 'admin')}
+        results = {}
+        for name, path, role in routes(objects, args.routes):
+            results[name] = measure(
+                driver, path, cookies.get(role), args.concurrency, args.requests, args.warmup,
+            )
+            print(f'{name:<28}{results[name]["p95_ms"]:>10} ms p95{results[name]["requests_per_second"]:>10} req/s',
+                  file=sys.stderr)
+        connections.close_all()
+
+    report = {
+        'mode': driver.mode,
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'rows': {
+            'users': User.objects.count(),
+            'requests': Request.objects.count(),
+            'responses': Response.objects.count(),
+        },
+        'routes': results,
+        'skipped': {name: reason for name, reason in SKIP.items() if not args.routes or name in args.routes},
+    }
+    output = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        sys.stdout.write(output)
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Bytes on the wire and load time per page, counting the static files each page references,
+for a first visit and for a repeat visit with a warm browser cache.
+
+Compare the static pipeline against Django's own static view, e.g.::
+
+    python manage.py runserver 8000                        # DEBUG=True, before
+    DEBUG=False python manage.py collectstatic --noinput   # after
+    DEBUG=False ALLOWED_HOSTS=127.0.0.1 gunicorn copal.wsgi -w 4 -b 127.0.0.1:8001
+
+    python benchmarks/static_assets.py --base-url http://127.0.0.1:8000 --json > before.json
+    python benchmarks/static_assets.py --base-url http://127.0.0.1:8001 --json > after.json
+
+Assets are fetched like a browser would: six at a time, accepting brotli and gzip. On a
+repeat visit, an asset whose ``Cache-Control`` allows caching for at least a day is taken from
+the browser cache; anything else is revalidated with ``If-None-Match``/``If-Modified-Since``.
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+
+ACCEPT_ENCODING = 'br, gzip, deflate'
+PARALLEL = 6
+ASSET_RE = r'(?:href|src)="({static}[^"]+)"'
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+DAY = 24 * 60 * 60
+
+
+def fetch(session, url, headers=None):
+    """Return ``(response, bytes on the wire)``; ``response.content`` is decoded."""
+    response = session.get(url, headers={'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})}, stream=True)
+    response.content
+    return response, response.raw.tell()
+
+
+def cached_for(response):
+    match = MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+    return int(match.group(1)) if match else 0
+
+
+def revalidation_headers(response):
+    headers = {}
+    if 'ETag' in response.headers:
+        headers['If-None-Match'] = response.headers['ETag']
+    if 'Last-Modified' in response.headers:
+        headers['If-Modified-Since'] = response.headers['Last-Modified']
+    return headers
+
+
+def visit(session, page_url, static_url, cache=None):
+    """
+    Load the page and its assets. ``cache`` maps asset URLs to their first-visit responses
+    (a repeat visit); returns ``(elapsed ms, bytes, requests, {asset url: (response, bytes)})``.
+    """
+    start = time.perf_counter()
+    page, page_bytes = fetch(session, page_url)
+    if cache is None:
+        assets = sorted(set(re.findall(ASSET_RE.format(static=re.escape(static_url)), page.text)))
+    else:
+        assets = list(cache)
+
+    def load(asset):
+        url = urljoin(page_url, asset)
+        if cache is None:
+            return asset, fetch(session, url)
+        previous, _ = cache[asset]
+        if cached_for(previous) >= DAY:
+            return asset, None
+        return asset, fetch(session, url, revalidation_headers(previous))
+
+    with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+        loaded = dict(pool.map(load, assets))
+    elapsed = (time.perf_counter() - start) * 1000
+    fetched = {asset: result for asset, result in loaded.items() if result is not None}
+    total = page_bytes + sum(size for _, size in fetched.values())
+    return elapsed, total, 1 + len(fetched), loaded
+
+
+def measure(base_url, path, static_url, runs, session):
+    page_url = urljoin(base_url, path)
+    first_ms, repeat_ms = [], []
+    for _ in range(runs):
+        elapsed, first_bytes, first_requests, assets = visit(session, page_url, static_url)
+        first_ms.append(elapsed)
+        elapsed, repeat_bytes, repeat_requests, _ = visit(session, page_url, static_url, assets)
+        repeat_ms.append(elapsed)
+    return {
+        'first_visit': {
+            'bytes': first_bytes, 'requests': first_requests,
+            'p50_ms': round(statistics.median(first_ms), 2), 'max_ms': round(max(first_ms), 2),
+        },
+        'repeat_visit': {
+            'bytes': repeat_bytes, 'requests': repeat_requests,
+            'p50_ms': round(statistics.median(repeat_ms), 2), 'max_ms': round(max(repeat_ms), 2),
+        },
+        'assets': {
+            asset: {
+                'status': response.status_code,
+                'bytes': size,
+                'encoding': response.headers.get('Content-Encoding', 'identity'),
+                'cache_control': response.headers.get('Cache-Control', ''),
+            }
+            for asset, (response, size) in assets.items()
+        },
+    }
+
+
+def login(session, base_url, email, password):
+    login_url = urljoin(base_url, 'en/login/')
+    session.get(login_url).raise_for_status()
+    response = session.post(login_url, data={
+        'username': email,
+        'password': password,
+        'csrfmiddlewaretoken': session.cookies['csrftoken'],
+    }, headers={'Referer': login_url}, allow_redirects=False)
+    if response.status_code != 302:
+        raise SystemExit(f'Login failed (HTTP {response.status_code})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/')
+    parser.add_argument('--page', action='append', dest='pages', help='Path to load (repeatable)')
+    parser.add_argument('--static-url', default='/static/')
+    parser.add_argument('--email', help='Sign in first, to load pages that need it')
+    parser.add_argument('--password')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    session = requests.Session()
+    if args.email:
+        login(session, args.base_url, args.email, args.password)
+    pages = args.pages or ['en/', 'en/login/', 'en/register/']
+    results = {path: measure(args.base_url, path, args.static_url, args.runs, session) for path in pages}
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    print(f'{"page":<20}{"first KB":>10}{"first ms":>10}{"repeat KB":>11}{"repeat req":>11}{"repeat ms":>11}')
+    for path, result in results.items():
+        first, repeat = result['first_visit'], result['repeat_visit']
+        print(f'{path:<20}{first["bytes"] / 1024:>10.1f}{first["p50_ms"]:>10}'
+              f'{repeat["bytes"] / 1024:>11.1f}{repeat["requests"]:>11}{repeat["p50_ms"]:>11}')
+    for path, result in results.items():
+        for asset, info in result['assets'].items():
+            print(f'  {asset}: HTTP {info["status"]}, {info["bytes"]} B {info["encoding"]}, '
+                  f'Cache-Control: {info["cache_control"] or "-"}')
+
+
+if __name__ == '__main__':
+    main()
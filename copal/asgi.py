@@ -3,6 +3,18 @@ ASGI config for copal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving it with uvicorn workers under gunicorn (one worker per core is a good start)::
+
+    gunicorn copal.asgi:application -k uvicorn.workers.UvicornWorker \
+        --workers 4 --bind 0.0.0.0:8000 --timeout 30
+
+or, for a single process, ``uvicorn copal.asgi:application --host 0.0.0.0 --port 8000``.
+Sync views still work under ASGI but each one runs in a worker thread; the async views
+(``*_async`` URL names) run on the event loop. Set ``DB_CONN_MAX_AGE=0`` under ASGI and
+reuse connections with ``DB_POOL=1`` instead: persistent connections belong to the thread
+that opened them, and ASGI runs sync code in short-lived threads.
+``benchmarks/asgi_vs_wsgi.py`` compares latency against the WSGI deployment.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from parler.admin import TranslatableAdmin
 from domestique.models import Client, Provider, Admin, Service, Request, Response
+from domestique.forms import ServiceChoiceField
+from domestique.inbox import update_entries
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
@@ -41,23 +43,38 @@ class AdminAdmin(admin.ModelAdmin):
 
 @admin.register(Service)
 class ServiceAdmin(TranslatableAdmin):
-    list_display = ('name', 'category')
+    list_display = ('catalog_name', 'category')
     search_fields = ('translations__name', 'category')
     list_filter = ('category',)
 
+    @admin.display(description=_('Name'))
+    def catalog_name(self, obj):
+        return str(obj)
+
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
     list_display = ('client', 'service', 'status', 'price', 'created_at')
     list_filter = ('status', 'service')
     search_fields = ('client__first_name', 'client__last_name')
+    list_select_related = ('client', 'service')
+    show_full_result_count = False
     actions = ['cancel_request']
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'service':
+            kwargs['form_class'] = ServiceChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def cancel_request(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
         queryset.update(status='CANCELLED')
+        update_entries(ids, request_status='CANCELLED')
     cancel_request.short_description = _("Cancel selected requests")
 
 @admin.register(Response)
 class ResponseAdmin(admin.ModelAdmin):
     list_display = ('request', 'provider', 'proposed_price', 'created_at')
     search_fields = ('provider__first_name', 'provider__last_name')
-    list_filter = ('request__status',)
\ No newline at end of file
+    list_filter = ('request__status',)
+    list_select_related = ('provider', 'request__client', 'request__service')
+    show_full_result_count = False
\ No newline at end of file
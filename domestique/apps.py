@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DomestiqueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'domestique'
+
+    def ready(self):
+        from domestique import metrics, signals  # noqa: F401
@@ -0,0 +1,46 @@
+"""
+Work run once the current transaction commits, off the request path.
+
+Each ``*_WORKERS`` setting gets its own thread pool, started on first use, so slow photo
+processing does not hold up geocoding and the other way round.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+
+
+def _run(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('%s%r failed', func.__name__, args)
+
+
+def _run_in_worker(func, args):
+    close_old_connections()
+    try:
+        _run(func, args)
+    finally:
+        close_old_connections()
+
+
+def run_after_commit(func, *args, workers_setting):
+    """
+    Call ``func(*args)`` after the current transaction commits, on a pool of as many threads
+    as the ``workers_setting`` setting says (inline when it is 0). Exceptions are logged.
+    """
+    workers = getattr(settings, workers_setting)
+    if not workers:
+        transaction.on_commit(lambda: _run(func, args))
+        return
+    executor = _executors.get(workers_setting)
+    if executor is None:
+        prefix = workers_setting.removesuffix('_WORKERS').lower()
+        executor = _executors[workers_setting] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=prefix)
+    transaction.on_commit(lambda: executor.submit(_run_in_worker, func, args))
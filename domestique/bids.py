@@ -0,0 +1,134 @@
+"""
+Bids (responses) on a request: statistics, and accepting one.
+
+A request's bids are its live responses that have not been rejected. ``with_bid_stats()``
+annotates a queryset of requests with their count and lowest/average/highest
+``proposed_price``; that is one grouped join, fine for a page of a client's requests. For
+listings sorted or filtered by bids, every request has a ``BidSummary`` row with the same
+figures, refreshed by receivers in ``domestique.signals`` when a response is created,
+changes status or price, or is deleted. ``refresh_bid_summaries()`` recomputes rows from
+scratch, for backfills and repairs.
+
+``accept_bid()`` locks the request row, so of two concurrent accepts (a double click, or two
+tabs) the second waits for the first and then finds the request no longer pending. The
+winning response becomes ``ACCEPTED`` and every other pending response to the request
+``REJECTED`` in one ``UPDATE``; as that bypasses the ``post_save`` receivers, the counter
+deltas, bid summary, inbox entries and the providers' events are applied here, in the same
+transaction.
+"""
+from collections import Counter, namedtuple
+
+from django.db import connections, transaction
+from django.db.models import Avg, Case, Count, Max, Min, Q, Value, When
+from django.utils import timezone
+
+from domestique import counters, events
+from domestique.models import BidSummary, InboxEntry, Request, Response
+
+BidState = namedtuple('BidState', ['request_id', 'counted', 'proposed_price'])
+
+BID_FIELDS = ('request_id', 'status', 'deleted_at', 'proposed_price')
+STAT_FIELDS = ('bid_count', 'lowest_bid', 'average_bid', 'highest_bid')
+
+
+def bid_state(values):
+    """Snapshot what a response with the field ``values`` adds to its request's bids, or None if some are deferred."""
+    if any(field not in values for field in BID_FIELDS):
+        return None
+    counted = values['deleted_at'] is None and values['status'] != 'REJECTED'
+    return BidState(values['request_id'], counted, values['proposed_price'] if counted else None)
+
+
+def with_bid_stats(requests):
+    """Annotate ``requests`` with ``bid_count``, ``lowest_bid``, ``average_bid`` and ``highest_bid``."""
+    bids = Q(responses__deleted_at__isnull=True) & ~Q(responses__status='REJECTED')
+    return requests.annotate(
+        bid_count=Count('responses', filter=bids),
+        lowest_bid=Min('responses__proposed_price', filter=bids),
+        average_bid=Avg('responses__proposed_price', filter=bids),
+        highest_bid=Max('responses__proposed_price', filter=bids),
+    )
+
+
+def refresh_bid_summaries(request_ids=None, create_missing=True, batch_size=1000):
+    """
+    Recompute the bid summaries of ``request_ids`` (default: every request). With
+    ``create_missing=False`` only existing rows are updated, which is what a response deleted
+    along with its request needs. Returns the number of rows written.
+
+    The rows of ``request_ids`` are locked first, so two transactions refreshing the same
+    request (two providers bidding at once) run one after the other and the second
+    aggregates the first one's committed bid instead of overwriting it with stale figures.
+    """
+    requests = Request.all_objects.all()
+    with transaction.atomic():
+        if request_ids is not None:
+            requests = requests.filter(pk__in=list(request_ids))
+            # NO KEY UPDATE where available: inserting a response holds KEY SHARE on its request,
+            # which a plain FOR UPDATE would wait for, deadlocking two bids made at once.
+            no_key = connections[requests.db].features.has_select_for_no_key_update
+            list(requests.select_for_update(no_key=no_key).order_by('pk').values_list('pk', flat=True))
+        stats = with_bid_stats(requests).order_by().values_list('pk', *STAT_FIELDS)
+        if not create_missing:
+            return sum(
+                BidSummary.objects.filter(request_id=pk).update(**dict(zip(STAT_FIELDS, values)), updated_at=timezone.now())
+                for pk, *values in stats
+            )
+
+        written = 0
+        batch = []
+        for pk, *values in stats.iterator(chunk_size=batch_size):
+            batch.append(BidSummary(request_id=pk, **dict(zip(STAT_FIELDS, values))))
+            if len(batch) == batch_size:
+                written += _upsert(batch)
+                batch = []
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(summaries):
+    BidSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=['request'], update_fields=[*STAT_FIELDS, 'updated_at'],
+    )
+    return len(summaries)
+
+
+def _settled_status(winner, field='pk'):
+    return Case(When(**{field: winner}, then=Value('ACCEPTED')), default=Value('REJECTED'))
+
+
+def accept_bid(request_id, provider_id, client_id=None):
+    """
+    Accept ``provider_id``'s pending response to request ``request_id`` (of ``client_id``, if
+    given). Returns the accepted ``Request``, or None if the request is not pending any more
+    or the provider has no pending response to it.
+    """
+    with transaction.atomic():
+        requests = Request.objects.select_for_update()
+        if client_id is not None:
+            requests = requests.filter(client_id=client_id)
+        request = requests.filter(pk=request_id, status='PENDING').first()
+        if request is None:
+            return None
+        bids = dict(Response.objects.filter(request=request, status='PENDING').values_list('pk', 'provider_id'))
+        winner = next((pk for pk, provider in bids.items() if provider == provider_id), None)
+        if winner is None:
+            return None
+
+        now = timezone.now()
+        Response.objects.filter(pk__in=list(bids)).update(status=_settled_status(winner), updated_at=now)
+        InboxEntry.objects.filter(response_id__in=list(bids)).update(status=_settled_status(winner, 'response_id'))
+        deltas = Counter()
+        if counters.request_state(request.__dict__).counted:
+            deltas[request.client_id, 'unread_responses'] -= len(bids)
+        counters.apply_deltas(deltas)
+        refresh_bid_summaries([request.pk])
+        events.publish_many(
+            (provider, 'response.accepted' if pk == winner else 'response.rejected', {'request': request.pk, 'response': pk})
+            for pk, provider in bids.items()
+        )
+
+        request.status = 'ACCEPTED'
+        request.accepted_provider_id = provider_id
+        request.save(update_fields=['status', 'accepted_provider', 'updated_at'])
+    return request
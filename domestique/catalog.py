@@ -0,0 +1,95 @@
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from parler.utils.i18n import get_active_language_choices, get_language
+
+from domestique.models import Service
+
+ServiceEntry = namedtuple('ServiceEntry', ['id', 'category', 'name', 'description'])
+
+VERSION_KEY = 'service-catalog:version'
+# How long a process trusts its local copy before re-reading the shared version number.
+LOCAL_TTL = 5
+ENTRIES_TIMEOUT = 60 * 60 * 24
+
+_local = {}
+
+
+def _version():
+    # Seeded from the clock so a version evicted from the cache never reuses an old number.
+    return cache.get_or_set(VERSION_KEY, time.time_ns, timeout=None)
+
+
+def _build(language_code):
+    languages = get_active_language_choices(language_code)
+    translations = {}
+    for master_id, code, name, description in Service._parler_meta.root_model.objects.values_list(
+        'master_id', 'language_code', 'name', 'description'
+    ):
+        translations.setdefault(master_id, {})[code] = (name, description)
+
+    entries = []
+    for pk, category in Service.objects.values_list('pk', 'category'):
+        by_language = translations.get(pk, {})
+        code = next((code for code in languages if code in by_language), None) or next(iter(by_language), None)
+        name, description = by_language[code] if code else ('', '')
+        entries.append(ServiceEntry(pk, category, name, description))
+    entries.sort(key=lambda entry: entry.name.lower())
+    return {entry.id: entry for entry in entries}
+
+
+def get_service_catalog(language_code=None):
+    """
+    Return ``{service_id: ServiceEntry}`` for ``language_code`` (default: the active
+    language), ordered by name.
+
+    Entries are kept in this process and in the shared cache, both keyed by a version
+    number that ``invalidate_service_catalog()`` bumps whenever a service or one of its
+    translations is saved or deleted.
+    """
+    language_code = language_code or get_language()
+    local = _local.get(language_code)
+    if local and local[0] > time.monotonic():
+        return local[2]
+
+    version = _version()
+    if local and local[1] == version:
+        entries = local[2]
+    else:
+        key = f'service-catalog:{version}:{language_code}'
+        entries = cache.get(key)
+        if entries is None:
+            entries = _build(language_code)
+            cache.set(key, entries, timeout=ENTRIES_TIMEOUT)
+    _local[language_code] = (time.monotonic() + LOCAL_TTL, version, entries)
+    return entries
+
+
+def get_service_catalog_version(language_code=None):
+    """The version of the entries ``get_service_catalog()`` returns, for keying what shows them."""
+    language_code = language_code or get_language()
+    get_service_catalog(language_code)
+    return _local[language_code][1]
+
+
+def get_service_entry(service_id, language_code=None):
+    return get_service_catalog(language_code).get(service_id)
+
+
+def invalidate_service_catalog():
+    """
+    Bump the version now, for reads in this transaction, and again once it commits: other
+    processes may have rebuilt the entries from the old rows under the first new version.
+    """
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    _local.clear()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,135 @@
+"""
+Dashboard counters kept up to date on write.
+
+``unread_responses`` (per client) counts the live, pending responses to the client's live,
+non-expired requests. ``accepted_requests`` (per provider) counts the live, non-expired
+requests the provider was accepted for. Receivers in ``domestique.signals`` turn every
+change to a ``Request`` or ``Response`` into deltas on the affected users' rows;
+``rebuild_counters()`` recomputes rows from scratch to repair drift.
+"""
+from collections import Counter, namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F
+
+from domestique.models import DashboardCounter, Request, Response, User
+
+RequestState = namedtuple('RequestState', ['client_id', 'accepted_provider_id', 'counted'])
+ResponseState = namedtuple('ResponseState', ['request_id', 'counted'])
+
+REQUEST_FIELDS = ('client_id', 'accepted_provider_id', 'status', 'deleted_at')
+RESPONSE_FIELDS = ('request_id', 'status', 'deleted_at')
+
+
+def unread_responses_queryset():
+    return Response.objects.filter(status='PENDING', request__deleted_at__isnull=True).exclude(request__status='EXPIRED')
+
+
+def accepted_requests_queryset():
+    return Request.objects.filter(accepted_provider__isnull=False).exclude(status='EXPIRED')
+
+
+def request_state(values):
+    """
+    Snapshot what a request with the field ``values`` (its ``__dict__`` or post_init snapshot)
+    contributes to the counters, or None if some of its fields are deferred.
+    """
+    if any(field not in values for field in REQUEST_FIELDS):
+        return None
+    counted = values['deleted_at'] is None and values['status'] != 'EXPIRED'
+    return RequestState(values['client_id'], values['accepted_provider_id'], counted)
+
+
+def response_state(values):
+    if any(field not in values for field in RESPONSE_FIELDS):
+        return None
+    return ResponseState(values['request_id'], values['status'] == 'PENDING' and values['deleted_at'] is None)
+
+
+def request_deltas(old, new, pending_responses):
+    """
+    Return the counter deltas for a request moving from ``old`` to ``new`` state (either may
+    be None for a created or deleted row). ``pending_responses`` is called lazily to get the
+    number of unread responses that move with the request.
+    """
+    deltas = Counter()
+    if old and old.counted and old.accepted_provider_id:
+        deltas[old.accepted_provider_id, 'accepted_requests'] -= 1
+    if new and new.counted and new.accepted_provider_id:
+        deltas[new.accepted_provider_id, 'accepted_requests'] += 1
+
+    old_unread = (old.client_id, old.counted) if old else (None, False)
+    new_unread = (new.client_id, new.counted) if new else (None, False)
+    if old and new and old_unread != new_unread:
+        pending = pending_responses()
+        if old.counted:
+            deltas[old.client_id, 'unread_responses'] -= pending
+        if new.counted:
+            deltas[new.client_id, 'unread_responses'] += pending
+    return deltas
+
+
+def response_deltas(old, new, request):
+    """Return the counter deltas for a response to ``request`` moving from ``old`` to ``new``."""
+    deltas = Counter()
+    state = request_state(request.__dict__) if request is not None else None
+    if state is None or not state.counted:
+        return deltas
+    deltas[state.client_id, 'unread_responses'] += int(bool(new and new.counted)) - int(bool(old and old.counted))
+    return deltas
+
+
+def apply_deltas(deltas, create_missing=True):
+    by_user = {}
+    for (user_id, field), delta in deltas.items():
+        if user_id is not None and delta:
+            by_user.setdefault(user_id, {})[field] = F(field) + delta
+    for user_id, changes in by_user.items():
+        updated = DashboardCounter.objects.filter(user_id=user_id).update(**changes)
+        if not updated and create_missing:
+            # No row yet: computing it from scratch already includes this change.
+            rebuild_counters([user_id])
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recompute the counters of ``user_ids`` (default: every user) from the source tables.
+    Returns the number of rows whose stored values were wrong or missing.
+
+    Reads the primary even inside ``read_from_replica()``: a lagging replica would write its
+    stale figures back as the truth.
+    """
+    unread = unread_responses_queryset().using(DEFAULT_DB_ALIAS)
+    accepted = accepted_requests_queryset().using(DEFAULT_DB_ALIAS)
+    users = User.objects.using(DEFAULT_DB_ALIAS)
+    existing = DashboardCounter.objects.using(DEFAULT_DB_ALIAS)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        unread = unread.filter(request__client_id__in=user_ids)
+        accepted = accepted.filter(accepted_provider_id__in=user_ids)
+        users = users.filter(pk__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+
+    unread = dict(unread.values_list('request__client_id').annotate(n=Count('pk')).order_by())
+    accepted = dict(accepted.values_list('accepted_provider_id').annotate(n=Count('pk')).order_by())
+    existing = {row[0]: row[1:] for row in existing.values_list('user_id', 'unread_responses', 'accepted_requests')}
+
+    stale = [
+        DashboardCounter(user_id=pk, unread_responses=unread.get(pk, 0), accepted_requests=accepted.get(pk, 0))
+        for pk in users.values_list('pk', flat=True).iterator()
+        if existing.get(pk) != (unread.get(pk, 0), accepted.get(pk, 0))
+    ]
+    with transaction.atomic():
+        DashboardCounter.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+            stale, batch_size=1000, update_conflicts=True,
+            unique_fields=['user'], update_fields=['unread_responses', 'accepted_requests', 'updated_at'],
+        )
+    return len(stale)
+
+
+def get_dashboard_counter(user_id):
+    counter = DashboardCounter.objects.filter(user_id=user_id).first()
+    if counter is None:
+        rebuild_counters([user_id])
+        counter = DashboardCounter.objects.using(DEFAULT_DB_ALIAS).get(user_id=user_id)
+    return counter
@@ -0,0 +1,253 @@
+"""
+Per-user notifications pushed to browsers with Server-Sent Events.
+
+Writers call ``publish()``, which stores ``Event`` rows in the current transaction. Every
+ASGI process runs one ``EventBroker``: a single task that reads rows newer than the last one
+it saw and hands them to the in-memory queues of the streams open in that process. It wakes
+up on a PostgreSQL ``NOTIFY`` sent by ``publish()``, on a commit made in the same process,
+or every ``EVENT_POLL_INTERVAL`` seconds. An idle stream is a suspended coroutine and a
+queue: no thread and no query of its own. A reconnecting browser sends ``Last-Event-ID``
+and gets what it missed from the table.
+
+Ids are taken at insert but rows become visible at commit, so on PostgreSQL an event can
+show up after one with a higher id. Each read therefore also looks again at the events of
+the last ``EVENT_LATE_COMMIT_SECONDS``: the broker remembers which of those it dispatched,
+and a replay re-sends that window, so an event near the resume point may arrive twice
+(the pages only reload on an event, so a repeat is harmless) but none is lost.
+
+Streams need the ASGI server. Under WSGI Django would buffer the whole never-ending
+response in a worker, so ``streams_events()`` is false there: pages leave the
+``EventSource`` out and the endpoint answers 204, which tells browsers not to reconnect.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from domestique.models import Event
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'domestique_events'
+# Seconds between comment lines on an idle stream, so proxies keep the connection open.
+KEEPALIVE = 15
+# Milliseconds the browser waits before reconnecting.
+RETRY = 3000
+REPLAY_LIMIT = 500
+# With LISTEN/NOTIFY the poll is only a safety net.
+NOTIFY_POLL_INTERVAL = 30
+
+
+def poll_interval():
+    return getattr(settings, 'EVENT_POLL_INTERVAL', 1.0)
+
+
+def late_commit_window():
+    return timedelta(seconds=getattr(settings, 'EVENT_LATE_COMMIT_SECONDS', 10))
+
+
+def streams_events(request):
+    """Whether ``request`` is served by the ASGI handler, the only one that can stream events."""
+    return isinstance(request, ASGIRequest)
+
+
+def publish(user_id, kind, **data):
+    publish_many([(user_id, kind, data)])
+
+
+def publish_many(events, using=DEFAULT_DB_ALIAS):
+    """Store ``(user_id, kind, data)`` events; streams see them once the transaction commits."""
+    rows = [Event(user_id=user_id, kind=kind, data=data) for user_id, kind, data in events if user_id is not None]
+    if not rows:
+        return
+    Event.objects.using(using).bulk_create(rows)
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, ''])
+    transaction.on_commit(broker.wake, using=using)
+
+
+def prune_events(older_than=timedelta(days=7)):
+    """Delete events older than ``older_than``; returns how many were deleted."""
+    deleted, _ = Event.objects.filter(created_at__lt=timezone.now() - older_than).delete()
+    return deleted
+
+
+def latest_event_id():
+    return Event.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def events_after(event_id, user_id=None, limit=None, since=None):
+    """Events with an id above ``event_id`` and, with ``since``, any lower one created since then."""
+    connections[DEFAULT_DB_ALIAS].close_if_unusable_or_obsolete()
+    condition = Q(id__gt=event_id)
+    if since is not None:
+        condition |= Q(id__lt=event_id, created_at__gte=since)
+    events = Event.objects.filter(condition).order_by('id')
+    if user_id is not None:
+        events = events.filter(user_id=user_id)
+    return list(events[:limit] if limit else events)
+
+
+def open_listener(using=DEFAULT_DB_ALIAS):
+    """Return a raw psycopg2 connection listening on ``CHANNEL``, or None if unsupported."""
+    wrapper = connections[using]
+    listener = wrapper.get_new_connection(wrapper.get_connection_params())
+    if not hasattr(listener, 'poll'):
+        listener.close()
+        return None
+    listener.autocommit = True
+    with listener.cursor() as cursor:
+        cursor.execute(f'LISTEN {CHANNEL}')
+    return listener
+
+
+class EventBroker:
+    """Fans new ``Event`` rows out to the streams open in this process."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.last_id = 0
+        # {id: created_at} of the dispatched events still inside the late-commit window.
+        self.recent = {}
+        self.loop = None
+        self.task = None
+        self.wakeup = None
+        self.listener = None
+
+    def subscribe(self, user_id):
+        self.ensure_running()
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self.subscribers.get(user_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(user_id, None)
+
+    def ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            # A fresh context: the task outlives the request that started it, and must not
+            # share that request's database connection.
+            self.task = loop.create_task(self.run(), context=contextvars.Context())
+
+    def wake(self):
+        """Make the broker look for new events now. Safe to call from any thread."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def dispatch(self, events):
+        for event in events:
+            if event.id in self.recent:
+                continue
+            self.recent[event.id] = event.created_at or timezone.now()
+            self.last_id = max(self.last_id, event.id)
+            for queue in self.subscribers.get(event.user_id, ()):
+                queue.put_nowait(event)
+        # Twice the window, so nothing is forgotten while a read can still return it.
+        cutoff = timezone.now() - 2 * late_commit_window()
+        for event_id in [event_id for event_id, created_at in self.recent.items() if created_at < cutoff]:
+            del self.recent[event_id]
+
+    def read_new_events(self):
+        return events_after(self.last_id, since=timezone.now() - late_commit_window())
+
+    def skip_existing_events(self):
+        """Start from the events already stored: the streams only want what comes next."""
+        self.recent = {}
+        self.last_id = latest_event_id()
+        for event in events_after(self.last_id, since=timezone.now() - late_commit_window()):
+            self.recent[event.id] = event.created_at
+
+    async def run(self):
+        try:
+            await sync_to_async(self.skip_existing_events)()
+            await self.listen()
+            # Stop when the last stream closes; the next subscriber starts a new task.
+            while self.subscribers:
+                interval = NOTIFY_POLL_INTERVAL if self.listener else poll_interval()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                try:
+                    self.dispatch(await sync_to_async(self.read_new_events)())
+                except Exception:
+                    logger.exception('Reading new events failed')
+        finally:
+            self.unlisten()
+
+    async def listen(self):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            return
+        try:
+            self.listener = await sync_to_async(open_listener)()
+        except Exception:
+            logger.exception('LISTEN %s failed, polling for events instead', CHANNEL)
+        if self.listener is not None:
+            self.loop.add_reader(self.listener.fileno(), self.on_notify)
+
+    def on_notify(self):
+        try:
+            self.listener.poll()
+            self.listener.notifies.clear()
+        except Exception:
+            logger.exception('Lost the LISTEN connection, polling for events instead')
+            self.unlisten()
+        self.wakeup.set()
+
+    def unlisten(self):
+        if self.listener is not None:
+            self.loop.remove_reader(self.listener.fileno())
+            self.listener.close()
+            self.listener = None
+
+
+broker = EventBroker()
+
+
+def format_event(event):
+    data = json.dumps(event.data, cls=DjangoJSONEncoder)
+    return f'id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n'
+
+
+async def event_stream(user_id, last_event_id=None):
+    """
+    Yield the SSE frames for ``user_id``: the events after ``last_event_id`` (when the browser
+    is resuming), then new ones as they arrive.
+    """
+    queue = broker.subscribe(user_id)
+    try:
+        yield f'retry: {RETRY}\n\n'
+        replayed = set()
+        if last_event_id is not None:
+            since = timezone.now() - late_commit_window()
+            for event in await sync_to_async(events_after)(last_event_id, user_id, REPLAY_LIMIT, since):
+                yield format_event(event)
+                replayed.add(event.id)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event.id not in replayed:
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(user_id, queue)
@@ -0,0 +1,105 @@
+import csv
+from datetime import datetime, time
+from functools import partial
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from domestique.models import Request, Response, User
+
+# name -> (model, filter field for ``status``, exported columns)
+EXPORTS = {
+    'requests': (Request, 'status', (
+        'id', 'client_id', 'service_id', 'status', 'price', 'location', 'description', 'task_date',
+        'accepted_provider_id', 'created_at', 'updated_at', 'deleted_at',
+    )),
+    'responses': (Response, 'status', (
+        'id', 'request_id', 'provider_id', 'status', 'proposed_price', 'message',
+        'created_at', 'updated_at', 'deleted_at',
+    )),
+    'users': (User, 'role', (
+        'id', 'email', 'first_name', 'last_name', 'phone', 'role', 'is_active',
+        'created_at', 'updated_at', 'deleted_at',
+    )),
+}
+FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 2000
+
+
+def parse_bound(value):
+    """Parse a ``YYYY-MM-DD`` or ISO datetime bound into an aware datetime; raise ValueError."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_rows(name, status=None, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the columns of ``name`` as tuples, soft-deleted rows included, filtered on status
+    and on ``since <= created_at < until``. Rows are streamed from a server-side cursor
+    in chunks, so memory use does not depend on the table size.
+    """
+    model, status_field, columns = EXPORTS[name]
+    queryset = model.all_objects.all()
+    if status:
+        queryset = queryset.filter(**{status_field: status})
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset.order_by().values_list(*columns).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """File-like object whose ``write`` hands back the line, for ``csv.writer`` generators."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(name, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORTS[name][2])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(name, rows):
+    columns = EXPORTS[name][2]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+def iter_export(name, fmt, **filters):
+    rows = export_rows(name, **filters)
+    return iter_csv(name, rows) if fmt == 'csv' else iter_jsonl(name, rows)
+
+
+async def aiter_export(name, fmt, **filters):
+    """
+    ``iter_export()`` for the ASGI handler, which would otherwise buffer a sync iterator in
+    full. The rows are still read by the blocking cursor, ``CHUNK_SIZE`` lines per hop to
+    its thread, and joined into one chunk of the response.
+    """
+    lines = iter_export(name, fmt, **filters)
+    take = partial(_take, lines, CHUNK_SIZE)
+    try:
+        while chunk := await sync_to_async(take)():
+            yield ''.join(chunk)
+    finally:
+        # Also when the client disconnects: releases the server-side cursor.
+        await sync_to_async(lines.close)()
+
+
+def _take(iterator, count):
+    return list(islice(iterator, count))
@@ -1,10 +1,12 @@
 
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
+from django.forms.models import ModelChoiceIterator
 from django.utils.translation import gettext_lazy as _
 from parler.forms import TranslatableModelForm
-from domestique.models import Client, Provider, Admin, Service
-from django.contrib.auth import authenticate
+from domestique.models import Client, Provider, Admin, Service, Request, Response
+from domestique.catalog import get_service_catalog
+from domestique.throttle import client_ip, is_login_throttled, record_login_failure, reset_login_failures
 
 class UserRegistrationForm(forms.Form):
     first_name = forms.CharField(
@@ -119,20 +121,79 @@ class UserLoginForm(AuthenticationForm):
         })
     )
 
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'invalid_login': _("Invalid email or password"),
+        'throttled': _("Too many failed login attempts. Please try again later."),
+    }
+
     def clean(self):
+        # AuthenticationForm.clean() authenticates: one password hash per attempt, none
+        # once the email or IP address has failed too often.
         username = self.cleaned_data.get('username')
-        password = self.cleaned_data.get('password')
-
-        if username and password:
-            user = authenticate(self.request, username=username, password=password)
-            if user is None:
-                raise forms.ValidationError(_("Invalid email or password"), code='invalid_login')
-
-        return super().clean()
+        ip = client_ip(self.request)
+        if username and is_login_throttled(username, ip):
+            raise forms.ValidationError(self.error_messages['throttled'], code='throttled')
+        try:
+            cleaned_data = super().clean()
+        except forms.ValidationError:
+            if username:
+                record_login_failure(username, ip)
+            raise
+        if self.user_cache is not None:
+            reset_login_failures(username)
+        return cleaned_data
 
 
 class ServiceForm(TranslatableModelForm):
     class Meta:
         model = Service
         fields = ['category', 'notes']
-        translated_fields = ['name', 'description']
\ No newline at end of file
+        translated_fields = ['name', 'description']
+
+
+class ServiceCatalogChoiceIterator(ModelChoiceIterator):
+    """Build the service options from the cached catalog instead of one translation query per row."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for entry in get_service_catalog().values():
+            yield (entry.id, entry.name)
+
+    def __len__(self):
+        return len(get_service_catalog()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(get_service_catalog())
+
+
+class ServiceChoiceField(forms.ModelChoiceField):
+    iterator = ServiceCatalogChoiceIterator
+
+    def __init__(self, queryset=None, **kwargs):
+        super().__init__(queryset=Service.objects.all() if queryset is None else queryset, **kwargs)
+
+
+class RequestForm(forms.ModelForm):
+    service = ServiceChoiceField(label=_('Service'))
+
+    class Meta:
+        model = Request
+        fields = ['service', 'description', 'location', 'price', 'task_date']
+
+
+class AdminRequestForm(RequestForm):
+    class Meta(RequestForm.Meta):
+        fields = ['client', 'service', 'description', 'location', 'price', 'status', 'accepted_provider', 'task_date']
+
+
+class AdminResponseForm(forms.ModelForm):
+    class Meta:
+        model = Response
+        fields = ['request', 'provider', 'message', 'proposed_price']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Request labels name the client and the service (from the catalog): one query for all options.
+        self.fields['request'].queryset = Request.objects.select_related('client', 'service')
@@ -0,0 +1,189 @@
+"""
+Coordinates for free-text locations, and "near me" lookups without PostGIS.
+
+Points are bucketed into square grid cells of ``GEO_CELL_DEGREES`` (about 5.5 km at the
+default 0.05). A radius query selects the cells covering the circle's bounding box through
+the indexed ``geo_cell`` column, then checks the exact great-circle distance in Python on
+those candidates only.
+
+Saves geocode inline only with a geocoder that answers from memory (``offline = True``).
+With one that goes over the network, a save clears the stale coordinates and
+``geocode_row()`` looks the new text up once the transaction commits, off the request
+path; ``geocode_locations`` backfills or retries from the command line.
+"""
+import math
+import time
+import unicodedata
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+EARTH_RADIUS_KM = 6371.0
+# Past this many cells a plain bounding-box filter is cheaper than a long IN list.
+MAX_CELLS = 400
+
+def cell_size():
+    return getattr(settings, 'GEO_CELL_DEGREES', 0.05)
+
+
+def cell_for(latitude, longitude):
+    size = cell_size()
+    return f'{math.floor(latitude / size)}:{math.floor(longitude / size)}'
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Haversine distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(latitude)), 1e-6)))
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+def cells_covering(min_lat, max_lat, min_lon, max_lon):
+    """Return the cells overlapping the box, or None if there are more than ``MAX_CELLS``."""
+    size = cell_size()
+    rows = range(math.floor(min_lat / size), math.floor(max_lat / size) + 1)
+    cols = range(math.floor(min_lon / size), math.floor(max_lon / size) + 1)
+    if len(rows) * len(cols) > MAX_CELLS:
+        return None
+    return [f'{row}:{col}' for row in rows for col in cols]
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Return the rows of ``queryset`` (a geolocated model) within ``radius_km`` of the point,
+    nearest first, each annotated with ``distance_km``.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    candidates = queryset.filter(
+        latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon)
+    )
+    cells = cells_covering(min_lat, max_lat, min_lon, max_lon)
+    if cells is not None:
+        candidates = candidates.filter(geo_cell__in=cells)
+
+    nearby = []
+    for obj in candidates:
+        obj.distance_km = distance_km(latitude, longitude, obj.latitude, obj.longitude)
+        if obj.distance_km <= radius_km:
+            nearby.append(obj)
+    nearby.sort(key=lambda obj: obj.distance_km)
+    return nearby
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+class OfflineGeocoder:
+    """
+    Looks places up in a fixed gazetteer of Cameroonian cities and Douala/Yaounde
+    neighbourhoods by substring, for the tests and local development. No network access,
+    but far too coarse for real addresses.
+    """
+    offline = True
+    places = {
+        'akwa': (4.0511, 9.7043),
+        'bonanjo': (4.0419, 9.6903),
+        'bonapriso': (4.0333, 9.6964),
+        'deido': (4.0633, 9.7100),
+        'bali': (4.0430, 9.7030),
+        'makepe': (4.0797, 9.7545),
+        'bonamoussadi': (4.0931, 9.7392),
+        'logbessou': (4.1020, 9.7750),
+        'ndokoti': (4.0450, 9.7370),
+        'bonaberi': (4.0740, 9.6650),
+        'douala': (4.0511, 9.7679),
+        'bastos': (3.8942, 11.5079),
+        'mvog-mbi': (3.8530, 11.5180),
+        'biyem-assi': (3.8320, 11.4850),
+        'yaounde': (3.8480, 11.5021),
+        'buea': (4.1527, 9.2410),
+        'limbe': (4.0186, 9.2043),
+        'kribi': (2.9395, 9.9107),
+        'bafoussam': (5.4781, 10.4176),
+        'garoua': (9.3017, 13.3921),
+        'bamenda': (5.9597, 10.1460),
+    }
+
+    def geocode(self, text):
+        text = _normalize(text or '')
+        # Prefer the most specific (longest) place named in the text.
+        for name in sorted(self.places, key=len, reverse=True):
+            if name in text:
+                return self.places[name]
+        return None
+
+
+class NominatimGeocoder:
+    """
+    OpenStreetMap Nominatim. Makes an HTTP request per lookup, so saves defer it (see above).
+
+    The usage policy allows one request per second and asks for a User-Agent that identifies
+    the application, with ``GEOCODER_CONTACT`` (an email address or URL) for contact. Each
+    lookup first takes a ``min_interval`` slot in the shared cache, so every thread and
+    process using the same cache counts against that one limit.
+    """
+    offline = False
+    url = 'https://nominatim.openstreetmap.org/search'
+    min_interval = 1
+    slot_key = 'geocoder:nominatim-slot'
+
+    def __init__(self):
+        contact = getattr(settings, 'GEOCODER_CONTACT', '')
+        if not contact:
+            raise ImproperlyConfigured('NominatimGeocoder needs GEOCODER_CONTACT for its User-Agent.')
+        self.user_agent = f'copal-geocoder/1.0 ({contact})'
+
+    def wait_for_slot(self):
+        while not cache.add(self.slot_key, True, timeout=self.min_interval):
+            time.sleep(0.1)
+
+    def geocode(self, text):
+        if not text:
+            return None
+        self.wait_for_slot()
+        response = requests.get(
+            self.url,
+            params={'q': text, 'format': 'json', 'limit': 1, 'countrycodes': 'cm'},
+            headers={'User-Agent': self.user_agent},
+            timeout=5,
+        )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+def get_geocoder():
+    path = getattr(settings, 'GEOCODER', '')
+    return import_string(path)() if path else None
+
+
+def geocode_row(model, pk, field):
+    """
+    Look up the ``field`` text of row ``pk`` and store its coordinates, unless the text
+    changed in the meantime. Returns True if the row was updated.
+    """
+    geocoder = get_geocoder()
+    text = model.all_objects.filter(pk=pk).values_list(field, flat=True).first()
+    if geocoder is None or not text:
+        return False
+    coordinates = geocoder.geocode(text)
+    if not coordinates:
+        return False
+    latitude, longitude = coordinates
+    return bool(model.all_objects.filter(pk=pk, **{field: text}).update(
+        latitude=latitude, longitude=longitude, geo_cell=cell_for(latitude, longitude),
+    ))
@@ -0,0 +1,104 @@
+"""
+Provider dashboard inbox kept up to date on write.
+
+The provider dashboard lists a provider's responses with the status, task date and service
+of the request each one answers. Instead of joining ``Response`` to ``Request`` on every
+load, each live response to a live request has an ``InboxEntry`` row with those fields
+copied in, so the dashboard is one scan of the ``(provider, -created_at)`` index. Receivers
+in ``domestique.signals`` refresh the rows when either model is saved; code that updates
+rows in bulk (which skips the receivers) calls ``update_entries()`` itself.
+``rebuild_inbox()`` recomputes rows from scratch for backfills and repairs.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+
+from domestique.models import InboxEntry, Response
+
+RequestState = namedtuple('RequestState', ['status', 'task_date', 'service_id', 'live'])
+ResponseState = namedtuple('ResponseState', ['provider_id', 'request_id', 'status', 'message', 'proposed_price', 'live'])
+
+REQUEST_FIELDS = ('status', 'task_date', 'service_id', 'deleted_at')
+RESPONSE_FIELDS = ('provider_id', 'request_id', 'status', 'message', 'proposed_price', 'deleted_at')
+# InboxEntry field: Response lookup.
+SOURCE_FIELDS = {
+    'response_id': 'pk',
+    'provider_id': 'provider_id',
+    'request_id': 'request_id',
+    'service_id': 'request__service_id',
+    'request_status': 'request__status',
+    'task_date': 'request__task_date',
+    'status': 'status',
+    'message': 'message',
+    'proposed_price': 'proposed_price',
+    'created_at': 'created_at',
+}
+
+
+def request_state(values):
+    """Snapshot the request field ``values`` copied into the inbox, or None if some are deferred."""
+    if any(field not in values for field in REQUEST_FIELDS):
+        return None
+    return RequestState(values['status'], values['task_date'], values['service_id'], values['deleted_at'] is None)
+
+
+def response_state(values):
+    if any(field not in values for field in RESPONSE_FIELDS):
+        return None
+    return ResponseState(*(values[field] for field in RESPONSE_FIELDS[:-1]), values['deleted_at'] is None)
+
+
+def update_entries(request_ids, **fields):
+    """Copy ``fields`` (``request_status``, ``task_date``, ``service_id``) into the entries of ``request_ids``."""
+    return InboxEntry.objects.filter(request_id__in=list(request_ids)).update(**fields)
+
+
+def sync_response(response):
+    """Write, or drop, the entry of ``response`` after it was saved."""
+    request = response.request
+    if response.deleted_at is not None or request.deleted_at is not None:
+        InboxEntry.objects.filter(response_id=response.pk).delete()
+        return
+    entry = InboxEntry(
+        response_id=response.pk, provider_id=response.provider_id, request_id=request.pk,
+        service_id=request.service_id, request_status=request.status, task_date=request.task_date,
+        status=response.status, message=response.message, proposed_price=response.proposed_price,
+        created_at=response.created_at,
+    )
+    _upsert([entry])
+
+
+def rebuild_inbox(provider_ids=None, request_ids=None, batch_size=1000):
+    """
+    Recompute the entries of ``provider_ids`` and/or ``request_ids`` (default: all of them)
+    from the response and request tables. Returns the number of entries written.
+    """
+    entries = InboxEntry.objects.all()
+    responses = Response.objects.filter(request__deleted_at__isnull=True)
+    if provider_ids is not None:
+        entries = entries.filter(provider_id__in=list(provider_ids))
+        responses = responses.filter(provider_id__in=list(provider_ids))
+    if request_ids is not None:
+        entries = entries.filter(request_id__in=list(request_ids))
+        responses = responses.filter(request_id__in=list(request_ids))
+    rows = responses.order_by().values_list(*SOURCE_FIELDS.values())
+
+    written = 0
+    batch = []
+    with transaction.atomic():
+        entries.delete()
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(InboxEntry(**dict(zip(SOURCE_FIELDS, row))))
+            if len(batch) == batch_size:
+                written += _upsert(batch)
+                batch = []
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(entries):
+    InboxEntry.objects.bulk_create(
+        entries, update_conflicts=True, unique_fields=['response'],
+        update_fields=[field for field in SOURCE_FIELDS if field != 'response_id'],
+    )
+    return len(entries)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from domestique.tasks import expire_overdue_requests
+
+
+class Command(BaseCommand):
+    help = 'Mark pending requests whose task date has passed as expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows updated per statement')
+
+    def handle(self, *args, **options):
+        expired, elapsed = expire_overdue_requests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} request(s) in {elapsed:.2f}s"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from domestique.exports import EXPORTS, FORMATS, iter_export, parse_bound
+
+
+class Command(BaseCommand):
+    help = 'Stream requests, responses or users to CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--status', help='Status to keep (role for users)')
+        parser.add_argument('--since', help='Keep rows created at or after this date/datetime')
+        parser.add_argument('--until', help='Keep rows created before this date/datetime')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_bound(options['since']) if options['since'] else None
+            until = parse_bound(options['until']) if options['until'] else None
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        chunks = iter_export(options['name'], options['format'], status=options['status'], since=since, until=until)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
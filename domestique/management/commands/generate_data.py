@@ -0,0 +1,35 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from domestique.synthetic import DEFAULT_PASSWORD, SERVICES, generate
+
+
+class Command(BaseCommand):
+    help = 'Add synthetic clients, providers, services, requests and responses for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--providers', type=int, default=200)
+        parser.add_argument('--admins', type=int, default=1)
+        parser.add_argument('--services', type=int, default=len(SERVICES))
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--responses-per-request', type=int, default=3, help='Average number of responses')
+        parser.add_argument('--days', type=int, default=180, help='Spread creation dates over this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, help='Make the run reproducible (on an empty database)')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every generated user')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        log = (lambda message: self.stderr.write(message)) if options['verbosity'] > 1 else None
+        counts = generate(
+            clients=options['clients'], providers=options['providers'], admins=options['admins'],
+            services=options['services'], requests=options['requests'],
+            responses_per_request=options['responses_per_request'], seed=options['seed'],
+            batch_size=options['batch_size'], days=options['days'], password=options['password'], log=log,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {json.dumps(counts)} in {time.perf_counter() - start:.1f}s"
+        ))
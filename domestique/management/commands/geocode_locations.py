@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from domestique.geo import get_geocoder
+from domestique.models import Request, User
+
+
+class Command(BaseCommand):
+    help = 'Fill in coordinates for requests and users that have none, and refresh grid cells'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Geocode rows that already have coordinates too')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        geocoder = get_geocoder()
+        for model, field in ((Request, 'location'), (User, 'address')):
+            queryset = model.all_objects.only('pk', field, 'latitude', 'longitude', 'geo_cell')
+            batch, updated = [], 0
+            for obj in queryset.iterator(chunk_size=options['batch_size']):
+                if obj.latitude is None or options['all']:
+                    coordinates = geocoder.geocode(getattr(obj, field)) if geocoder else None
+                    if coordinates:
+                        obj.set_coordinates(*coordinates)
+                else:
+                    obj.set_coordinates(obj.latitude, obj.longitude)
+                batch.append(obj)
+                if len(batch) >= options['batch_size']:
+                    updated += model.all_objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+                    batch = []
+            updated += model.all_objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {updated} row(s) updated")
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import F
+
+from domestique.models import User
+from domestique.photos import generate_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate the missing thumbnail variants of user photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Photos processed in parallel (default 4)')
+
+    def handle(self, *args, **options):
+        pending = (
+            User.all_objects.exclude(photo='').exclude(photo__isnull=True)
+            .exclude(photo_variants=F('photo')).values_list('pk', flat=True)
+        )
+
+        def process(user_id):
+            try:
+                return generate_variants(user_id)
+            finally:
+                close_old_connections()
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                done = sum(pool.map(process, list(pending)))
+        else:
+            done = sum(map(generate_variants, list(pending)))
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} photo(s)"))
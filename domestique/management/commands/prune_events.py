@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from domestique.events import prune_events
+
+
+class Command(BaseCommand):
+    help = 'Delete event stream notifications older than a number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Keep events this many days old (default 7)')
+
+    def handle(self, *args, **options):
+        deleted = prune_events(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} event(s)"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from domestique.bids import refresh_bid_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the bid count and lowest/average/highest bid of every request'
+
+    def handle(self, *args, **options):
+        written = refresh_bid_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} bid summary row(s)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from domestique.inbox import rebuild_inbox
+
+
+class Command(BaseCommand):
+    help = 'Recompute the provider dashboard inbox from the response and request tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', action='append', dest='providers', help='Only this provider id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_inbox(provider_ids=options['providers'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} inbox row(s)"))
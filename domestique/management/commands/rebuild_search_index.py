@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from domestique.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        if backend is None:
+            raise CommandError('This database has no full-text search index.')
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from domestique.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from the request and response tables'
+
+    def handle(self, *args, **options):
+        repaired = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} dashboard counter(s)"))
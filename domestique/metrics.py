@@ -0,0 +1,188 @@
+"""
+Per-route timings: wall time, database queries and time, and template render time.
+
+``MetricsMiddleware`` measures every request, reports it to the browser in a
+``Server-Timing`` header, adds it to this process's histograms (served in the Prometheus
+text format by ``MetricsView``) and logs requests over ``METRICS_SLOW_REQUEST_MS`` or
+``METRICS_QUERY_BUDGET`` queries together with their slowest statement. Each worker process
+keeps its own histograms.
+"""
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.slowest_sql = None
+        self.slowest_time = 0.0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_sql, self.slowest_time = sql, duration
+
+
+def record_queries(execute, sql, params, many, context):
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histograms by metric and route; safe to update from several threads."""
+
+    metrics = {
+        'copal_request_duration_seconds': ('Wall time per request.', DURATION_BUCKETS),
+        'copal_db_queries': ('Database queries per request.', QUERY_BUCKETS),
+        'copal_db_duration_seconds': ('Database time per request.', DURATION_BUCKETS),
+        'copal_template_duration_seconds': ('Template render time per request.', DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, route, values):
+        with self.lock:
+            for name, value in values.items():
+                histogram = self.histograms.get((name, route))
+                if histogram is None:
+                    histogram = self.histograms[name, route] = Histogram(self.metrics[name][1])
+                histogram.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in self.metrics.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (metric, route), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    label = f'route="{route}"'
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else '<unresolved>'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def start(self):
+        stats = RequestStats()
+        return stats, _stats.set(stats), time.perf_counter()
+
+    def process_template_response(self, request, response):
+        stats = _stats.get()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.template_time += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, stats, start):
+        wall = time.perf_counter() - start
+        route = route_name(request)
+        registry.observe(route, {
+            'copal_request_duration_seconds': wall,
+            'copal_db_queries': stats.queries,
+            'copal_db_duration_seconds': stats.db_time,
+            'copal_template_duration_seconds': stats.template_time,
+        })
+        response['Server-Timing'] = (
+            f'total;dur={wall * 1000:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'tpl;dur={stats.template_time * 1000:.1f}'
+        )
+        slow_ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500)
+        query_budget = getattr(settings, 'METRICS_QUERY_BUDGET', 50)
+        if wall * 1000 > slow_ms or stats.queries > query_budget:
+            logger.warning(
+                'Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms; slowest %.0f ms: %s',
+                request.method, request.path, route, wall * 1000, stats.queries, stats.db_time * 1000,
+                stats.slowest_time * 1000, (stats.slowest_sql or '')[:1000],
+            )
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0002_request_task_date_response_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-created_at', '-id'], name='request_live_status_created'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0003_request_live_status_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'task_date'], name='request_status_task_date'),
+        ),
+    ]
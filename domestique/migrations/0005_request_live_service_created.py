@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0004_request_status_task_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['service', 'status', '-created_at', '-id'], name='request_live_service_created'),
+        ),
+    ]
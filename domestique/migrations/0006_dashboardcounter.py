@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0005_request_live_service_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_responses', models.IntegerField(default=0)),
+                ('accepted_requests', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard counter',
+                'verbose_name_plural': 'Dashboard counters',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0006_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['request', 'status'], name='response_live_request_status'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['provider', '-created_at'], name='response_live_provider_created'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('domestique', '0007_live_row_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['last_name', 'first_name', 'id'], name='user_live_name'),
+        ),
+    ]
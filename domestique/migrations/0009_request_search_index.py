@@ -0,0 +1,46 @@
+from django.db import migrations
+
+FTS_TABLE = 'domestique_request_fts'
+TSVECTOR_TABLE = 'domestique_request_search'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "request_id UNINDEXED, description, location, services, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {TSVECTOR_TABLE} ("
+            "request_id uuid PRIMARY KEY REFERENCES domestique_request (id) ON DELETE CASCADE "
+            "DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {TSVECTOR_TABLE}_document ON {TSVECTOR_TABLE} USING GIN (document)")
+    else:
+        return
+
+    from domestique.search import BACKENDS
+    backend_class = BACKENDS[connection.vendor][0]
+    backend_class(connection.alias).rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TSVECTOR_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0008_user_live_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
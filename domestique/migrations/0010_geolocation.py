@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('domestique', '0009_request_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='geo_cell',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='geo_cell',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['geo_cell', 'status'], name='request_live_geo_cell'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['geo_cell'], name='user_geo_cell'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 20:06
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0010_geolocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('response.created', 'New response'), ('response.accepted', 'Response accepted'), ('response.rejected', 'Response rejected'), ('request.expired', 'Request expired')], max_length=32)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Event',
+                'verbose_name_plural': 'Events',
+                'indexes': [models.Index(fields=['user', 'id'], name='event_user_id'), models.Index(fields=['created_at'], name='event_created_at')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0011_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='photo_variants',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
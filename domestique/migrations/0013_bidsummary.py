@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 21:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0012_user_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidSummary',
+            fields=[
+                ('request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bid_summary', serialize=False, to='domestique.request')),
+                ('bid_count', models.IntegerField(default=0)),
+                ('lowest_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('average_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('highest_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Bid summary',
+                'verbose_name_plural': 'Bid summaries',
+                'indexes': [models.Index(fields=['bid_count', 'request'], name='bid_summary_count'), models.Index(fields=['lowest_bid', 'request'], name='bid_summary_lowest')],
+            },
+        ),
+    ]
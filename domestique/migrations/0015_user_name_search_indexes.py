@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Admin lists prefix-search users with ``istartswith``, which each backend renders in its own
+# way, so each gets the index its form can use:
+#   PostgreSQL: UPPER("last_name"::text) LIKE UPPER('smi%'), served by an index on the same
+#               expression with text_pattern_ops (LIKE ignores the collation's ordering).
+#   SQLite:     "last_name" LIKE 'smi%' ESCAPE '\', case-insensitive, so the column is indexed
+#               COLLATE NOCASE.
+# Not partial: the request and response lists search their users deleted or not.
+SEARCH_FIELDS = ('last_name', 'first_name', 'email')
+
+
+def index_name(field):
+    return f'user_{field}_search'
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for field in SEARCH_FIELDS:
+        if vendor == 'postgresql':
+            column = f'UPPER("{field}"::text) text_pattern_ops'
+        elif vendor == 'sqlite':
+            column = f'"{field}" COLLATE NOCASE'
+        else:
+            return
+        schema_editor.execute(f'CREATE INDEX {index_name(field)} ON domestique_user ({column})')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(field)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domestique', '0014_inboxentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,17 +1,36 @@
 
 import uuid
-from django.db import models
+from django.core.cache import cache
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.templatetags.static import static
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils.translation import gettext_lazy as _
 from parler.models import TranslatableModel, TranslatedFields
 
+class LiveManager(models.Manager):
+    """
+    Default manager of soft-deletable models: hides rows whose ``deleted_at`` is set.
+
+    Being the default manager, it also hides them from the ``/admin/`` changelists and from
+    ``manage.py dumpdata``, which needs ``--all`` to include soft-deleted rows. Use
+    ``all_objects`` to find or restore them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class BaseModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         abstract = True
 
@@ -19,7 +38,44 @@ class BaseModel(models.Model):
         self.deleted_at = timezone.now()
         self.save()
 
-class UserManager(BaseUserManager):
+    def _perform_unique_checks(self, unique_checks):
+        # Django checks through the default manager, which hides soft-deleted rows; they still
+        # hold their unique values in the table, so check them too instead of failing on save.
+        errors = super()._perform_unique_checks(unique_checks)
+        for model_class, unique_check in unique_checks:
+            key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+            if key in errors or not hasattr(model_class, 'all_objects'):
+                continue
+            lookup = {}
+            for field_name in unique_check:
+                field = self._meta.get_field(field_name)
+                value = getattr(self, field.attname)
+                if value is None or (field.primary_key and not self._state.adding):
+                    break
+                lookup[field_name] = value
+            else:
+                deleted = model_class.all_objects.filter(deleted_at__isnull=False, **lookup)
+                if not self._state.adding and self._is_pk_set(model_class._meta):
+                    deleted = deleted.exclude(pk=self._get_pk_val(model_class._meta))
+                if deleted.exists():
+                    errors[key] = [self.unique_error_message(model_class, unique_check)]
+        return errors
+
+class Geolocated(models.Model):
+    """Optional coordinates plus the grid cell used to find nearby rows (see ``domestique.geo``)."""
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    class Meta:
+        abstract = True
+
+    def set_coordinates(self, latitude, longitude):
+        from domestique.geo import cell_for
+        self.latitude, self.longitude = latitude, longitude
+        self.geo_cell = cell_for(latitude, longitude) if latitude is not None and longitude is not None else ''
+
+class UserManager(LiveManager, BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError(_('Email is required'))
@@ -38,12 +94,14 @@ class UserManager(BaseUserManager):
         extra_fields['role'] = 'ADMIN'
         return self.create_user(email, password, **extra_fields)
 
-class User(BaseModel, AbstractBaseUser, PermissionsMixin):
+class User(BaseModel, Geolocated, AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
     phone = models.CharField(max_length=15)
     email = models.EmailField(unique=True)
     photo = models.ImageField(upload_to='user_photos/', null=True, blank=True)
+    # Name of the photo the thumbnails in ``photo_url()`` were generated from.
+    photo_variants = models.CharField(max_length=100, blank=True, editable=False)
     address = models.TextField()
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -57,10 +115,31 @@ class User(BaseModel, AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
+        indexes = [
+            # Admin lists: ordered by name. Their prefix search has per-backend indexes in
+            # migration 0015, as Index() cannot express a NOCASE collation or an opclass on both.
+            models.Index(
+                fields=['last_name', 'first_name', 'id'],
+                name='user_live_name',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(fields=['geo_cell'], name='user_geo_cell'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def photo_ready(self):
+        return bool(self.photo) and self.photo_variants == self.photo.name
+
+    def photo_url(self, size='medium', ext='webp'):
+        """URL of a thumbnail of ``photo``, or of the placeholder until it has been generated."""
+        from domestique.photos import PLACEHOLDER, variant_name
+        if self.photo_ready:
+            return self.photo.storage.url(variant_name(self.photo.name, size, ext))
+        return static(PLACEHOLDER)
+
 class Client(User):
     class Meta:
         verbose_name = _('Client')
@@ -82,6 +161,35 @@ class Provider(User):
         self.role = 'PROVIDER'
         super().save(*args, **kwargs)
 
+    # Bounds how long a value cached from a transaction that was then rolled back can live.
+    SKILL_IDS_CACHE_TIMEOUT = 60 * 60
+
+    @staticmethod
+    def skill_ids_cache_key(provider_id):
+        return f'provider-skill-ids:{provider_id}'
+
+    @classmethod
+    def cached_skill_ids(cls, provider_id):
+        """Return the ids of the provider's skills, cached until ``skills`` changes."""
+        key = cls.skill_ids_cache_key(provider_id)
+        skill_ids = cache.get(key)
+        if skill_ids is None:
+            skill_ids = frozenset(
+                cls.skills.through.objects.filter(provider_id=provider_id).values_list('service_id', flat=True)
+            )
+            cache.set(key, skill_ids, timeout=cls.SKILL_IDS_CACHE_TIMEOUT)
+        return skill_ids
+
+    @classmethod
+    def invalidate_skill_ids(cls, provider_ids):
+        """
+        Drop the cached skills of ``provider_ids`` now, for reads in this transaction, and
+        again once it commits, as other processes may have cached the old rows meanwhile.
+        """
+        keys = [cls.skill_ids_cache_key(pk) for pk in provider_ids]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
 class Admin(User):
     class Meta:
         verbose_name = _('Admin')
@@ -106,9 +214,11 @@ class Service(TranslatableModel):
         verbose_name_plural = _('Services')
 
     def __str__(self):
-        return self.name
+        from domestique.catalog import get_service_entry
+        entry = get_service_entry(self.pk) if self.pk else None
+        return entry.name if entry else self.name
 
-class Request(BaseModel):
+class Request(BaseModel, Geolocated):
     STATUS_CHOICES = (
         ('PENDING', _('Pending')),
         ('ACCEPTED', _('Accepted')),
@@ -129,10 +239,37 @@ class Request(BaseModel):
     class Meta:
         verbose_name = _('Request')
         verbose_name_plural = _('Requests')
+        indexes = [
+            # Marketplace listing: live requests by status, newest first (keyset on created_at, id).
+            models.Index(
+                fields=['status', '-created_at', '-id'],
+                name='request_live_status_created',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Skill-matched feed: live requests for a set of services, newest first.
+            models.Index(
+                fields=['service', 'status', '-created_at', '-id'],
+                name='request_live_service_created',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Nearby feed: live requests by grid cell.
+            models.Index(
+                fields=['geo_cell', 'status'],
+                name='request_live_geo_cell',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Expiry sweep: pending requests whose task date has passed.
+            models.Index(fields=['status', 'task_date'], name='request_status_task_date'),
+        ]
 
     def __str__(self):
         return f"Request by {self.client} for {self.service}"
 
+    def save(self, *args, **kwargs):
+        # Keep the row and the dashboard counters (updated by post_save receivers) in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def is_expired(self):
         if self.task_date and self.task_date < timezone.now():
             self.status = 'EXPIRED'
@@ -155,6 +292,116 @@ class Response(BaseModel):
     class Meta:
         verbose_name = _('Response')
         verbose_name_plural = _('Responses')
+        indexes = [
+            models.Index(
+                fields=['request', 'status'],
+                name='response_live_request_status',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['provider', '-created_at'],
+                name='response_live_provider_created',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Response by {self.provider} to {self.request}"
+
+    def save(self, *args, **kwargs):
+        # Keep the row and the dashboard counters (updated by post_save receivers) in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class BidSummary(models.Model):
+    """Per-request bid totals, maintained on write by ``domestique.bids``."""
+    request = models.OneToOneField(Request, on_delete=models.CASCADE, primary_key=True, related_name='bid_summary')
+    bid_count = models.IntegerField(default=0)
+    lowest_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    average_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    highest_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Bid summary')
+        verbose_name_plural = _('Bid summaries')
+        indexes = [
+            # Admin request list sorted or filtered by number of bids, then by lowest bid.
+            models.Index(fields=['bid_count', 'request'], name='bid_summary_count'),
+            models.Index(fields=['lowest_bid', 'request'], name='bid_summary_lowest'),
+        ]
+
+    def __str__(self):
+        return f"Bids on {self.request_id}"
+
+class InboxEntry(models.Model):
+    """
+    A provider's response as listed on their dashboard, with the request fields it shows
+    copied in; maintained on write by ``domestique.inbox``.
+    """
+    response = models.OneToOneField(Response, on_delete=models.CASCADE, primary_key=True, related_name='inbox_entry')
+    provider = models.ForeignKey(Provider, on_delete=models.CASCADE, related_name='+', db_index=False)
+    request = models.ForeignKey(Request, on_delete=models.CASCADE, related_name='+')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='+', db_index=False)
+    request_status = models.CharField(max_length=20, choices=Request.STATUS_CHOICES)
+    task_date = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Response.STATUS_CHOICES)
+    message = models.TextField()
+    proposed_price = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _('Inbox entry')
+        verbose_name_plural = _('Inbox entries')
+        indexes = [
+            # Provider dashboard: one provider's responses, newest first.
+            models.Index(fields=['provider', '-created_at'], name='inbox_provider_created'),
+        ]
+
+    def __str__(self):
+        return f"Inbox entry for {self.response_id}"
+
+    @property
+    def service_name(self):
+        from domestique.catalog import get_service_entry
+        entry = get_service_entry(self.service_id)
+        return entry.name if entry else ''
+
+class DashboardCounter(models.Model):
+    """Per-user dashboard totals, maintained on write by ``domestique.counters``."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard_counter')
+    unread_responses = models.IntegerField(default=0)
+    accepted_requests = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Dashboard counter')
+        verbose_name_plural = _('Dashboard counters')
+
+    def __str__(self):
+        return f"Counters for {self.user_id}"
+
+class Event(models.Model):
+    """A notification for one user, pushed over the event stream by ``domestique.events``."""
+    KIND_CHOICES = (
+        ('response.created', _('New response')),
+        ('response.accepted', _('Response accepted')),
+        ('response.rejected', _('Response rejected')),
+        ('request.expired', _('Request expired')),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Event')
+        verbose_name_plural = _('Events')
+        indexes = [
+            models.Index(fields=['user', 'id'], name='event_user_id'),
+            models.Index(fields=['created_at'], name='event_created_at'),
+        ]
 
     def __str__(self):
-        return f"Response by {self.provider} to {self.request}"
\ No newline at end of file
+        return f"{self.kind} for {self.user_id}"
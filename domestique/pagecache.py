@@ -0,0 +1,75 @@
+"""
+Full-page cache for anonymous visitors.
+
+An anonymous page differs between visitors only by language (the URL prefix) and by the
+CSRF token in its forms: ``base.html`` has the language switcher on every page.
+``AnonymousPageCacheMixin`` renders such a page once per language and path with a
+placeholder instead of the token, keeps the HTML for ``PAGE_CACHE_SECONDS`` and writes the
+visitor's own token into every copy it serves. Signed-in users, and URLs with a query
+string, always get a fresh page.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+# Survives HTML escaping, and never appears in a real page.
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-5c1e0a'
+
+
+def page_cache_timeout():
+    return getattr(settings, 'PAGE_CACHE_SECONDS', 600)
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.path.encode()).hexdigest()
+    return f'page:{get_language()}:{path}'
+
+
+def fill_csrf_token(request, content):
+    placeholder = CSRF_PLACEHOLDER.encode()
+    if placeholder not in content:
+        return content
+    return content.replace(placeholder, get_token(request).encode())
+
+
+class AnonymousPageCacheMixin:
+    """For template views whose page is the same for every anonymous visitor."""
+    caching_page = False
+
+    def page_is_cacheable(self, request):
+        # Not with a query string: the pages may use it (``?next=``), and keying on it would let
+        # a visitor fill the cache with one copy per made-up parameter.
+        return (
+            request.method in ('GET', 'HEAD') and not request.GET and not request.user.is_authenticated
+            and page_cache_timeout()
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.page_is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(fill_csrf_token(request, content), content_type=content_type)
+
+        self.caching_page = True
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda response: self.store_page(request, key, response))
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.caching_page:
+            context['csrf_token'] = CSRF_PLACEHOLDER
+        return context
+
+    def store_page(self, request, key, response):
+        if response.status_code == 200 and not response.cookies:
+            cache.set(key, (response.content, response['Content-Type']), page_cache_timeout())
+        response.content = fill_csrf_token(request, response.content)
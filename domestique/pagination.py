@@ -0,0 +1,117 @@
+import base64
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model):
+    """Return the ``(created_at, pk)`` position encoded in ``cursor``, or raise Http404."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = model._meta.pk.to_python(pk)
+    except (ValueError, UnicodeDecodeError, ValidationError):
+        created_at = None
+    if created_at is None:
+        raise Http404(_('Invalid page cursor.'))
+    return created_at, pk
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView pagination on ``(created_at, id)``, newest first.
+
+    Pages are addressed by an opaque ``?cursor=`` pointing at the last row of the previous
+    page, so every page is a range scan on the index instead of an OFFSET over all the
+    rows before it.
+    """
+    paginate_by = 20
+    cursor_kwarg = 'cursor'
+
+    def keyset_queryset(self, queryset, page_size):
+        """Return the query for the requested page: one row more than ``page_size``."""
+        queryset = queryset.order_by('-created_at', '-pk')
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor:
+            created_at, pk = decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        return queryset[:page_size + 1]
+
+    def keyset_page(self, rows, page_size):
+        next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        page = KeysetPage(rows[:page_size], next_cursor)
+        return (None, page, page.object_list, page.has_next() or bool(self.request.GET.get(self.cursor_kwarg)))
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.keyset_page(list(self.keyset_queryset(queryset, page_size)), page_size)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        rows = [obj async for obj in self.keyset_queryset(queryset, page_size)]
+        return self.keyset_page(rows, page_size)
+
+
+def estimated_row_count(model, using='default'):
+    """Return the planner's row estimate for ``model``'s table on PostgreSQL, else None."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded ``COUNT(*)``.
+
+    With ``estimate=True`` (an unfiltered listing) a large PostgreSQL table is sized from the
+    planner's statistics; otherwise rows are counted up to ``count_limit``. Either way
+    ``is_approximate`` is set so templates can show the total as approximate.
+    """
+    count_limit = 10000
+
+    def __init__(self, *args, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate = estimate
+        self.is_approximate = False
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            estimate = estimated_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate > self.count_limit:
+                self.is_approximate = True
+                return estimate
+        count = self.object_list[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            self.is_approximate = True
+            return self.count_limit
+        return count
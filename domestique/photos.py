@@ -0,0 +1,73 @@
+"""
+Thumbnails for ``User.photo``.
+
+The original upload is kept as is; pages show fixed-size square variants in WebP (with a
+JPEG fallback) generated off the request path. A save that changes the photo schedules
+``generate_variants()`` on a thread pool once the transaction commits, and
+``User.photo_variants`` records which original the stored variants were made from. Until it
+matches ``photo`` the placeholder is served. ``process_photos`` backfills or retries from
+the command line.
+"""
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# name -> edge in pixels; pages pick one by name.
+SIZES = {'small': 64, 'medium': 256}
+# extension -> (Pillow format, save options)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+PLACEHOLDER = 'domestique/images/avatar-placeholder.svg'
+
+def variant_name(photo_name, size, ext):
+    """``user_photos/a.png`` -> ``user_photos/variants/a-medium.webp``."""
+    directory, filename = posixpath.split(photo_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}-{size}.{ext}')
+
+
+def render_variants(source):
+    """Yield ``(size, ext, bytes)`` for every variant of the image file ``source``."""
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding: far less memory for large photos.
+        image.draft('RGB', (max(SIZES.values()) * 2,) * 2)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size, edge in sorted(SIZES.items(), key=lambda item: -item[1]):
+            image = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+            for ext, (fmt, options) in FORMATS.items():
+                buffer = io.BytesIO()
+                image.save(buffer, fmt, **options)
+                yield size, ext, buffer.getvalue()
+
+
+def generate_variants(user_id):
+    """Write the variants of the user's current photo; returns True if any were made."""
+    from domestique.models import User
+
+    user = User.all_objects.filter(pk=user_id).only('photo', 'photo_variants').first()
+    if user is None or not user.photo or user.photo_variants == user.photo.name:
+        return False
+    storage = user.photo.storage
+    photo_name = user.photo.name
+    with storage.open(photo_name) as source:
+        for size, ext, data in render_variants(source):
+            name = variant_name(photo_name, size, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(data))
+
+    # Only mark them ready if the photo was not replaced in the meantime.
+    marked = User.all_objects.filter(pk=user_id, photo=photo_name).update(photo_variants=photo_name)
+    if marked and user.photo_variants:
+        delete_variants(storage, user.photo_variants)
+    return bool(marked)
+
+
+def delete_variants(storage, photo_name):
+    for size in SIZES:
+        for ext in FORMATS:
+            storage.delete(variant_name(photo_name, size, ext))
@@ -0,0 +1,138 @@
+"""
+Read replicas for read-only views.
+
+Only code running inside ``read_from_replica()`` (entered by ``ReplicaReadMixin`` in
+``domestique.views``) reads from a replica; everything else, and every write, uses
+``default``. Once a request writes, its remaining reads go to ``default`` too, and
+``ReplicaMiddleware`` keeps the browser on ``default`` for ``REPLICA_STICKY_SECONDS``
+afterwards so it reads its own writes despite replication lag.
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Replica the current request reads from, if any.
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+# Mutable so that writes made in a worker thread (sync_to_async) are seen by the request.
+_writes = contextvars.ContextVar('primary_writes', default=None)
+
+STICKY_COOKIE = 'primary_until'
+
+
+def _database(alias):
+    settings_dict = connections[alias].settings_dict
+    return settings_dict.get('HOST'), settings_dict.get('PORT'), settings_dict['NAME']
+
+
+def replica_aliases():
+    """
+    The configured replicas, minus any that are the primary's database itself: test mirrors,
+    which Django points at the test database, sharing its host, port and name.
+    """
+    primary = _database(DEFAULT_DB_ALIAS)
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if _database(alias) != primary]
+
+
+def current_read_alias():
+    return _read_alias.get()
+
+
+@contextmanager
+def read_from_replica(alias=None):
+    """Send reads to ``alias`` (default: a random replica) until the block exits or a write."""
+    replicas = replica_aliases()
+    if alias is None and replicas:
+        alias = random.choice(replicas)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def routing_state():
+    """Return a function that re-applies this context's routing, e.g. in a worker thread."""
+    alias, writes = _read_alias.get(), _writes.get()
+
+    def restore():
+        _read_alias.set(alias)
+        _writes.set(writes)
+    return restore
+
+
+@contextmanager
+def track_writes():
+    writes = []
+    token = _writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _writes.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        writes = _writes.get()
+        if writes:
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None:
+            writes.append(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaMiddleware:
+    """
+    Marks a request as stuck to the primary (``request.prefers_primary``) while the browser's
+    ``primary_until`` cookie is in the future, and sets that cookie when a request writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        with track_writes() as writes:
+            response = self.get_response(request)
+        return self.process_response(response, writes)
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        with track_writes() as writes:
+            response = await self.get_response(request)
+        return self.process_response(response, writes)
+
+    def process_request(self, request):
+        try:
+            request.prefers_primary = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            request.prefers_primary = False
+
+    def process_response(self, response, writes):
+        if writes:
+            window = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time()) + window), max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
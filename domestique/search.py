@@ -0,0 +1,165 @@
+"""
+Full-text search over requests: their description and location plus the names of their
+service in every language.
+
+The index lives outside the ORM: an FTS5 virtual table on SQLite, a ``tsvector`` table with
+a GIN index on PostgreSQL (both created by migration 0009). It only stores text; status and
+soft-delete filtering come from the queryset the search is restricted to.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from domestique.models import Request, Service
+
+FTS_TABLE = 'domestique_request_fts'
+TSVECTOR_TABLE = 'domestique_request_search'
+
+
+def _subquery(queryset):
+    sql, params = queryset.values('pk').query.sql_with_params()
+    return sql, list(params)
+
+
+class SearchBackend:
+    def __init__(self, using):
+        self.using = using
+        self.connection = connections[using]
+
+    def execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def table(self, model):
+        return self.connection.ops.quote_name(model._meta.db_table)
+
+    def _index(self, ids_sql, params):
+        self.execute(f'DELETE FROM {self.index_table} WHERE request_id IN ({ids_sql})', params)
+        self.execute(self.insert_sql.format(
+            index=self.index_table,
+            request=self.table(Request),
+            translation=self.table(Service._parler_meta.root_model),
+            ids=ids_sql,
+        ), params)
+
+    def reindex(self, requests):
+        """Replace the index entries of the requests in ``requests`` (a queryset)."""
+        self._index(*_subquery(Request.all_objects.using(self.using).filter(pk__in=requests.values('pk'))))
+
+    def rebuild(self):
+        """Index every request from scratch, with raw SQL only so migrations can call it."""
+        self.execute(f'DELETE FROM {self.index_table}')
+        self._index(f'SELECT id FROM {self.table(Request)}', [])
+
+    def remove(self, request_ids):
+        pk = Request._meta.pk
+        params = [pk.get_db_prep_value(request_id, self.connection) for request_id in request_ids]
+        if params:
+            placeholders = ', '.join(['%s'] * len(params))
+            self.execute(f'DELETE FROM {self.index_table} WHERE request_id IN ({placeholders})', params)
+
+    def count(self, query, queryset):
+        sql, params = self.match_sql(query, queryset)
+        return self.execute(f'SELECT COUNT(*) FROM ({sql}) matches', params)[0][0]
+
+    def ranked_ids(self, query, queryset, offset, limit):
+        sql, params = self.match_sql(query, queryset)
+        # Equal ranks are common (same text), and without a tiebreaker their order may differ
+        # between the queries of two pages, repeating some rows and skipping others.
+        rows = self.execute(f'{sql} ORDER BY rank, request_id LIMIT %s OFFSET %s', params + [limit, offset])
+        return [Request._meta.pk.to_python(row[0]) for row in rows]
+
+
+class SQLiteFTSBackend(SearchBackend):
+    index_table = FTS_TABLE
+    insert_sql = (
+        'INSERT INTO {index} (request_id, description, location, services) '
+        'SELECT r.id, r.description, r.location, '
+        '(SELECT group_concat(t.name, \' \') FROM {translation} t WHERE t.master_id = r.service_id) '
+        'FROM {request} r WHERE r.deleted_at IS NULL AND r.id IN ({ids})'
+    )
+
+    def match_sql(self, query, queryset):
+        # Every word must match, as a prefix; quoting keeps user input out of the FTS5 syntax.
+        terms = ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+        sql, params = _subquery(queryset)
+        return (
+            f'SELECT request_id, bm25({FTS_TABLE}, 0, 1.0, 0.5, 2.0) AS rank FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND request_id IN ({sql})',
+            [terms] + params,
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    index_table = TSVECTOR_TABLE
+    # 'simple' configuration: the catalog is bilingual, so no language-specific stemming.
+    insert_sql = (
+        'INSERT INTO {index} (request_id, document) '
+        'SELECT r.id, '
+        'setweight(to_tsvector(\'simple\', coalesce(string_agg(t.name, \' \'), \'\')), \'A\') || '
+        'setweight(to_tsvector(\'simple\', r.description), \'B\') || '
+        'setweight(to_tsvector(\'simple\', r.location), \'C\') '
+        'FROM {request} r LEFT JOIN {translation} t ON t.master_id = r.service_id '
+        'WHERE r.deleted_at IS NULL AND r.id IN ({ids}) GROUP BY r.id'
+    )
+
+    def match_sql(self, query, queryset):
+        sql, params = _subquery(queryset)
+        return (
+            f'SELECT request_id, -ts_rank(document, websearch_to_tsquery(\'simple\', %s)) AS rank '
+            f'FROM {TSVECTOR_TABLE} WHERE document @@ websearch_to_tsquery(\'simple\', %s) '
+            f'AND request_id IN ({sql})',
+            [query, query] + params,
+        )
+
+
+BACKENDS = {'sqlite': (SQLiteFTSBackend, FTS_TABLE), 'postgresql': (PostgresSearchBackend, TSVECTOR_TABLE)}
+_available = {}
+
+
+def get_search_backend(using='default'):
+    """Return the full-text backend for ``using``, or None if its database has no index."""
+    connection = connections[using]
+    backend_class, table = BACKENDS.get(connection.vendor, (None, None))
+    if backend_class is None:
+        return None
+    if using not in _available:
+        _available[using] = table in connection.introspection.table_names()
+    return backend_class(using) if _available[using] else None
+
+
+class RankedRequests:
+    """
+    Lazy, sliceable search result for ``Paginator``: each page runs one ranked match query
+    restricted to ``queryset`` and loads just that page's requests.
+    """
+
+    def __init__(self, backend, query, queryset):
+        self.backend = backend
+        self.query = query
+        self.queryset = queryset
+        self.model = queryset.model
+
+    def count(self):
+        return self.backend.count(self.query, self.queryset)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        ids = self.backend.ranked_ids(self.query, self.queryset, offset, index.stop - offset)
+        requests = self.queryset.in_bulk(ids)
+        return [requests[pk] for pk in ids if pk in requests]
+
+
+def search_requests(query, queryset):
+    """Return the requests of ``queryset`` matching ``query``, best match first."""
+    backend = get_search_backend(queryset.db)
+    if backend is not None and re.search(r'\w', query):
+        return RankedRequests(backend, query, queryset)
+    return queryset.filter(
+        Q(description__icontains=query) | Q(location__icontains=query)
+        | Q(service__translations__name__icontains=query)
+    ).distinct().order_by('-created_at', '-pk')
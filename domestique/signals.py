@@ -0,0 +1,252 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from domestique import bids, counters, events, inbox, photos
+from domestique.background import run_after_commit
+from domestique.geo import geocode_row, get_geocoder
+from domestique.search import get_search_backend
+from domestique.catalog import invalidate_service_catalog
+from domestique.models import User, Client, Provider, Admin, Service, Request, Response, BidSummary
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(m2m_changed, sender=Provider.skills.through)
+def invalidate_provider_skill_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Provider.invalidate_skill_ids([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        Provider.invalidate_skill_ids(pk_set)
+    elif action == 'pre_clear':
+        Provider.invalidate_skill_ids(instance.providers.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Service._parler_meta.root_model)
+@receiver(post_delete, sender=Service._parler_meta.root_model)
+def invalidate_service_catalog_on_change(sender, **kwargs):
+    invalidate_service_catalog()
+
+
+# Fields of each model read by the counters, bid summaries, inbox and events on save.
+SNAPSHOT_FIELDS = {
+    Request: tuple(dict.fromkeys((*counters.REQUEST_FIELDS, *inbox.REQUEST_FIELDS))),
+    Response: tuple(dict.fromkeys((*counters.RESPONSE_FIELDS, *bids.BID_FIELDS, *inbox.RESPONSE_FIELDS))),
+}
+
+
+@receiver(post_init, sender=Request)
+@receiver(post_init, sender=Response)
+def take_snapshot(sender, instance, **kwargs):
+    """Remember the loaded values of ``SNAPSHOT_FIELDS``; deferred fields are left out."""
+    values = instance.__dict__
+    instance._snapshot = {field: values[field] for field in SNAPSHOT_FIELDS[sender] if field in values}
+
+
+@receiver(post_save, sender=Request)
+def update_counters_for_request(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else counters.request_state(instance._snapshot)
+    new = counters.request_state(instance.__dict__)
+    if new is None or (old is None and not created):
+        # Saved from a deferred instance: the previous state is unknown, recompute instead.
+        instance.refresh_from_db(fields=['client', 'accepted_provider'])
+        counters.rebuild_counters([instance.client_id, instance.accepted_provider_id])
+    elif old != new:
+        pending = Response.objects.filter(request=instance, status='PENDING').count
+        counters.apply_deltas(counters.request_deltas(old, new, pending))
+
+
+@receiver(post_delete, sender=Request)
+def update_counters_for_deleted_request(sender, instance, **kwargs):
+    # Unread responses are subtracted by the cascaded Response deletes.
+    deltas = counters.request_deltas(counters.request_state(instance.__dict__), None, None)
+    counters.apply_deltas(deltas, create_missing=False)
+
+
+@receiver(post_save, sender=Response)
+def update_counters_for_response(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else counters.response_state(instance._snapshot)
+    new = counters.response_state(instance.__dict__)
+    if new is None or (old is None and not created):
+        counters.rebuild_counters([instance.request.client_id])
+    elif old != new and ((old and old.counted) or new.counted):
+        if old and old.request_id != new.request_id:
+            deltas = counters.response_deltas(old, None, Request.all_objects.get(pk=old.request_id))
+            deltas.update(counters.response_deltas(None, new, instance.request))
+        else:
+            deltas = counters.response_deltas(old, new, instance.request)
+        counters.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Response)
+def update_counters_for_deleted_response(sender, instance, **kwargs):
+    state = counters.response_state(instance.__dict__)
+    if state and state.counted:
+        deltas = counters.response_deltas(state, None, Request.all_objects.filter(pk=state.request_id).first())
+        counters.apply_deltas(deltas, create_missing=False)
+
+
+@receiver(post_save, sender=Request)
+def create_bid_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        BidSummary.objects.create(request=instance)
+
+
+@receiver(post_save, sender=Response)
+def update_bid_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else bids.bid_state(instance._snapshot)
+    new = bids.bid_state(instance.__dict__)
+    if new is None or old != new:
+        bids.refresh_bid_summaries({instance.request_id} | ({old.request_id} if old else set()))
+
+
+@receiver(post_delete, sender=Response)
+def update_bid_summary_for_deleted_response(sender, instance, **kwargs):
+    # When the request goes too, its summary was deleted first and must not come back.
+    bids.refresh_bid_summaries([instance.request_id], create_missing=False)
+
+
+@receiver(post_save, sender=Request)
+def update_inbox_for_request(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    old, new = inbox.request_state(instance._snapshot), inbox.request_state(instance.__dict__)
+    if new is None or old is None or old.live != new.live:
+        # Deferred fields, or the request was (un)deleted: redo its entries.
+        inbox.rebuild_inbox(request_ids=[instance.pk])
+    elif old != new:
+        inbox.update_entries(
+            [instance.pk], request_status=new.status, task_date=new.task_date, service_id=new.service_id,
+        )
+
+
+@receiver(post_save, sender=Response)
+def update_inbox_for_response(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = inbox.response_state(instance.__dict__)
+    if created or new is None or inbox.response_state(instance._snapshot) != new:
+        inbox.sync_response(instance)
+
+
+@receiver(post_save, sender=Request)
+def publish_request_events(sender, instance, created, raw=False, **kwargs):
+    if not raw and instance.status == 'EXPIRED' and instance._snapshot.get('status') != 'EXPIRED':
+        events.publish(instance.client_id, 'request.expired', request=instance.pk)
+
+
+@receiver(post_save, sender=Response)
+def publish_response_events(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        events.publish(
+            instance.request.client_id, 'response.created',
+            request=instance.request_id, response=instance.pk, proposed_price=instance.proposed_price,
+        )
+    elif instance.status in ('ACCEPTED', 'REJECTED') and instance.status != instance._snapshot.get('status'):
+        events.publish(
+            instance.provider_id, f'response.{instance.status.lower()}',
+            request=instance.request_id, response=instance.pk,
+        )
+
+
+# Connected after every receiver above, which all compare against the snapshot taken before the save.
+@receiver(post_save, sender=Request)
+@receiver(post_save, sender=Response)
+def retake_snapshot(sender, instance, **kwargs):
+    take_snapshot(sender, instance)
+
+
+@receiver(post_save, sender=Request)
+def index_request(sender, instance, raw=False, using='default', **kwargs):
+    backend = get_search_backend(using)
+    if backend is not None and not raw:
+        backend.reindex(Request.all_objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Request)
+def unindex_request(sender, instance, using='default', **kwargs):
+    backend = get_search_backend(using)
+    if backend is not None:
+        backend.remove([instance.pk])
+
+
+@receiver(post_save, sender=Service._parler_meta.root_model)
+@receiver(post_delete, sender=Service._parler_meta.root_model)
+def reindex_service_requests(sender, instance, raw=False, using='default', **kwargs):
+    backend = get_search_backend(using)
+    if backend is not None and not raw:
+        backend.reindex(Request.all_objects.filter(service_id=instance.master_id))
+
+
+GEOCODED_MODELS = (Request, User, Client, Provider, Admin)
+
+
+def geocoded_text_field(instance):
+    return 'location' if isinstance(instance, Request) else 'address'
+
+
+def remember_geocoded_text(sender, instance, **kwargs):
+    instance._geocoded_text = instance.__dict__.get(geocoded_text_field(instance))
+
+
+def geocode_on_save(sender, instance, raw=False, **kwargs):
+    field = geocoded_text_field(instance)
+    if raw or field not in instance.__dict__:
+        return
+    text = instance.__dict__[field]
+    adding = instance._state.adding
+    if text != instance._geocoded_text or (adding and instance.latitude is None):
+        coordinates = None
+        geocoder = get_geocoder()
+        if geocoder is not None and text:
+            if getattr(geocoder, 'offline', False):
+                try:
+                    coordinates = geocoder.geocode(text)
+                except Exception:
+                    logger.exception('Geocoding %r failed', text)
+            else:
+                # A network lookup: drop the stale point now, fill it in after the commit.
+                instance._geocode_after_save = True
+        instance.set_coordinates(*(coordinates or (None, None)))
+        instance._geocoded_text = text
+    else:
+        # Keep the cell in step with coordinates set directly.
+        instance.set_coordinates(instance.latitude, instance.longitude)
+
+
+def geocode_after_save(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_geocode_after_save', False):
+        return
+    instance._geocode_after_save = False
+    # The model declaring the coordinates (``User`` for its subclasses) owns the table to update.
+    model = instance._meta.get_field('latitude').model
+    run_after_commit(geocode_row, model, instance.pk, geocoded_text_field(instance), workers_setting='GEOCODER_WORKERS')
+
+
+for model in GEOCODED_MODELS:
+    post_init.connect(remember_geocoded_text, sender=model, dispatch_uid=f'geocode-init-{model.__name__}')
+    pre_save.connect(geocode_on_save, sender=model, dispatch_uid=f'geocode-save-{model.__name__}')
+    post_save.connect(geocode_after_save, sender=model, dispatch_uid=f'geocode-after-save-{model.__name__}')
+
+
+def process_photo_on_save(sender, instance, raw=False, **kwargs):
+    if raw or 'photo' not in instance.__dict__:
+        return
+    if instance.photo and instance.photo.name != instance.photo_variants:
+        run_after_commit(photos.generate_variants, instance.pk, workers_setting='PHOTO_WORKERS')
+
+
+for model in (User, Client, Provider, Admin):
+    post_save.connect(process_photo_on_save, sender=model, dispatch_uid=f'photo-save-{model.__name__}')
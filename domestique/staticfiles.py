@@ -0,0 +1,47 @@
+"""
+Static files served by WhiteNoise from ``STATIC_ROOT``.
+
+``collectstatic`` writes every file under a content-hashed name plus gzip and brotli copies,
+and WhiteNoise serves the hashed names with a ten-year ``immutable`` ``Cache-Control`` and
+the smallest encoding the browser accepts. Its middleware is sync-only, which would put every
+request of the ASGI stack through a worker thread; ``StaticFilesMiddleware`` passes other
+requests straight through and only leaves the event loop to open a static file.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    A template that links to a file missing from the static directories gets its plain URL
+    (and a 404 for it) instead of failing the whole page with a ``ValueError``.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
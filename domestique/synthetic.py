@@ -0,0 +1,361 @@
+"""
+Synthetic data at production scale: clients, providers, translated services, requests and
+responses, for load tests and query plans.
+
+Rows are written with ``bulk_create`` (raw ``executemany`` for the child tables of the user
+models, which ``bulk_create`` cannot fill), one transaction per batch, so signals do not run.
+The derived data they would maintain is rebuilt once at the end: dashboard counters, the
+search index and the service catalog. Every user gets the same password, hashed once.
+"""
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from domestique.bids import refresh_bid_summaries
+from domestique.catalog import invalidate_service_catalog
+from domestique.counters import rebuild_counters
+from domestique.geo import OfflineGeocoder
+from domestique.inbox import rebuild_inbox
+from domestique.models import Admin, Client, Provider, Request, Response, Service, User
+from domestique.search import get_search_backend
+
+DEFAULT_PASSWORD = 'copal-bench'
+EMAIL_DOMAIN = 'example.test'
+
+# category, English name, French name, typical price (XAF)
+SERVICES = [
+    ('Cleaning', 'House cleaning', 'Ménage', 10000),
+    ('Cleaning', 'Laundry and ironing', 'Lessive et repassage', 6000),
+    ('Cleaning', 'Window cleaning', 'Nettoyage des vitres', 8000),
+    ('Cooking', 'Home cooking', 'Cuisine à domicile', 12000),
+    ('Cooking', 'Event catering', 'Traiteur pour événements', 75000),
+    ('Childcare', 'Babysitting', 'Garde d\'enfants', 8000),
+    ('Childcare', 'Homework help', 'Aide aux devoirs', 7000),
+    ('Care', 'Elderly care', 'Aide aux personnes âgées', 15000),
+    ('Repairs', 'Plumbing', 'Plomberie', 20000),
+    ('Repairs', 'Electrical repairs', 'Électricité', 20000),
+    ('Repairs', 'Carpentry', 'Menuiserie', 25000),
+    ('Repairs', 'Painting', 'Peinture', 30000),
+    ('Repairs', 'Appliance repair', 'Réparation d\'appareils', 15000),
+    ('Outdoor', 'Gardening', 'Jardinage', 10000),
+    ('Outdoor', 'Security guard', 'Gardiennage', 50000),
+    ('Transport', 'Moving help', 'Aide au déménagement', 40000),
+    ('Transport', 'Errands and deliveries', 'Courses et livraisons', 5000),
+    ('Beauty', 'Hairdressing at home', 'Coiffure à domicile', 8000),
+    ('Education', 'Private tutoring', 'Cours particuliers', 10000),
+    ('Pets', 'Pet sitting', 'Garde d\'animaux', 6000),
+]
+
+FIRST_NAMES = [
+    'Aminatou', 'Brice', 'Carine', 'Didier', 'Estelle', 'Fabrice', 'Grace', 'Hervé', 'Ines', 'Jules',
+    'Koffi', 'Laure', 'Martial', 'Nadège', 'Olivier', 'Patience', 'Rodrigue', 'Sandrine', 'Thierry', 'Yvonne',
+]
+LAST_NAMES = [
+    'Abega', 'Biya', 'Eto\'o', 'Fotso', 'Kamga', 'Manga', 'Mbarga', 'Mvondo', 'Ndjock', 'Ngono',
+    'Nkeng', 'Nkoulou', 'Onana', 'Song', 'Tchakounte', 'Tchoumi', 'Wandji', 'Yebga', 'Zambo', 'Essomba',
+]
+DESCRIPTIONS = [
+    '{service} needed {when}. {detail}',
+    'Looking for someone for {service_lower} {when}. {detail}',
+    'Need help with {service_lower}, {when}. {detail}',
+]
+WHEN = ['this weekend', 'next Monday', 'as soon as possible', 'every Saturday morning', 'in the evening']
+DETAILS = [
+    'Three-bedroom apartment on the second floor.',
+    'Please bring your own tools.',
+    'The house is behind the pharmacy.',
+    'Must be available for a few hours.',
+    'Call before coming.',
+    'Experience and references appreciated.',
+]
+MESSAGES = [
+    'I can do it {when}, I have five years of experience.',
+    'Available {when}. Price includes materials.',
+    'Hello, I am nearby and can come {when}.',
+    'I have done this many times, references on request.',
+]
+
+# status -> share of requests
+REQUEST_STATUSES = {'PENDING': 60, 'ACCEPTED': 15, 'COMPLETED': 10, 'CANCELLED': 5, 'EXPIRED': 10}
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the ``created_at``/``updated_at`` values set on the instances."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_rows(model, columns, rows, using='default'):
+    """``INSERT`` ``rows`` (tuples of Python values for ``columns``) into ``model``'s own table."""
+    connection = connections[using]
+    fields = [model._meta.get_field(name) for name in columns]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class Generator:
+    def __init__(self, seed=None, batch_size=5000, days=180, password=DEFAULT_PASSWORD, log=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.password = make_password(password)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.places = list(OfflineGeocoder.places.items())
+
+    def uuid(self):
+        return uuid.UUID(int=self.random.getrandbits(128), version=4)
+
+    def moment(self):
+        """A random time within the last ``days`` days."""
+        return self.now - timedelta(seconds=self.random.randrange(max(self.days, 1) * 86400))
+
+    def locate(self, obj):
+        place, (latitude, longitude) = self.random.choice(self.places)
+        obj.set_coordinates(
+            round(latitude + self.random.uniform(-0.01, 0.01), 6),
+            round(longitude + self.random.uniform(-0.01, 0.01), 6),
+        )
+        return f'Rue {self.random.randint(1, 999)}, {place.title()}'
+
+    # Users
+
+    def users(self, role, count):
+        for _ in range(count):
+            pk = self.uuid()
+            joined = self.moment()
+            user = User(
+                id=pk, role=role, password=self.password,
+                email=f'{role.lower()}-{pk.hex[:12]}@{EMAIL_DOMAIN}',
+                first_name=self.random.choice(FIRST_NAMES), last_name=self.random.choice(LAST_NAMES),
+                phone=f'+2376{self.random.randrange(10 ** 8):08d}',
+                is_staff=role == 'ADMIN', is_superuser=role == 'ADMIN',
+                created_at=joined, updated_at=joined,
+            )
+            user.address = self.locate(user)
+            yield user
+
+    def create_users(self, model, count, extra_columns=(), extra_values=lambda user: ()):
+        role = model.__name__.upper()
+        ids = []
+        for batch in batched(self.users(role, count), self.batch_size):
+            with transaction.atomic(), explicit_timestamps(User):
+                User.objects.bulk_create(batch)
+                insert_rows(
+                    model, ('user_ptr',) + tuple(extra_columns),
+                    [(user.pk,) + tuple(extra_values(user)) for user in batch],
+                )
+            ids += [user.pk for user in batch]
+            self.log(f'{model._meta.verbose_name_plural}: {len(ids)}/{count}')
+        return ids
+
+    # Services
+
+    def create_services(self, count):
+        languages = [code for code, _ in settings.LANGUAGES]
+        services, translations = [], []
+        for n in range(count):
+            category, name_en, name_fr, price = SERVICES[n % len(SERVICES)]
+            suffix = f' {n // len(SERVICES) + 1}' if n >= len(SERVICES) else ''
+            service = Service(category=category)
+            services.append(service)
+            for code in languages:
+                name = (name_fr if code == 'fr' else name_en) + suffix
+                translations.append((service, code, name))
+        with transaction.atomic():
+            Service.objects.bulk_create(services)
+            Translation = Service._parler_meta.root_model
+            Translation.objects.bulk_create([
+                Translation(master_id=service.pk, language_code=code, name=name, description=name)
+                for service, code, name in translations
+            ], batch_size=self.batch_size)
+        self.log(f'Services: {len(services)}')
+        # service id -> (English name, typical price)
+        return {service.pk: (SERVICES[n % len(SERVICES)][1], SERVICES[n % len(SERVICES)][3]) for n, service in enumerate(services)}
+
+    def create_skills(self, provider_ids, service_ids):
+        """Give every provider one to four skills; returns service id -> provider ids."""
+        Skill = Provider.skills.through
+        by_service = {service_id: [] for service_id in service_ids}
+        rows = []
+        for provider_id in provider_ids:
+            for service_id in self.random.sample(service_ids, min(len(service_ids), self.random.randint(1, 4))):
+                rows.append(Skill(provider_id=provider_id, service_id=service_id))
+                by_service[service_id].append(provider_id)
+        with transaction.atomic():
+            Skill.objects.bulk_create(rows, batch_size=self.batch_size)
+        return by_service
+
+    # Requests and responses
+
+    def request_status(self):
+        return self.random.choices(list(REQUEST_STATUSES), weights=list(REQUEST_STATUSES.values()))[0]
+
+    def price(self, base):
+        return Decimal(round(base * self.random.uniform(0.6, 1.6), -2)).quantize(Decimal('0.01'))
+
+    def requests(self, count, client_ids, services):
+        service_ids = list(services)
+        for _ in range(count):
+            created = self.moment()
+            status = self.request_status()
+            if status == 'PENDING':
+                task_date = self.now + timedelta(hours=self.random.randint(2, 24 * 30))
+            elif status == 'EXPIRED':
+                task_date = self.now - timedelta(hours=self.random.randint(1, 24 * 30))
+                created = min(created, task_date - timedelta(hours=1))
+            else:
+                task_date = created + timedelta(hours=self.random.randint(2, 24 * 14))
+            service_id = self.random.choice(service_ids)
+            service_name, base_price = services[service_id]
+            template = self.random.choice(DESCRIPTIONS)
+            request = Request(
+                id=self.uuid(), client_id=self.random.choice(client_ids), service_id=service_id,
+                description=template.format(
+                    service=service_name, service_lower=service_name.lower(),
+                    when=self.random.choice(WHEN), detail=self.random.choice(DETAILS),
+                ),
+                price=self.price(base_price), status=status, task_date=task_date,
+                created_at=created, updated_at=created,
+            )
+            request.location = self.locate(request)
+            yield request
+
+    def responses(self, request, provider_ids, mean):
+        count = self.random.randint(0, mean * 2)
+        if request.status in ('ACCEPTED', 'COMPLETED'):
+            count = max(count, 1)
+        providers = self.random.sample(provider_ids, min(count, len(provider_ids)))
+        accepted = providers[0] if providers and request.status in ('ACCEPTED', 'COMPLETED') else None
+        request.accepted_provider_id = accepted
+        age = max((self.now - request.created_at).total_seconds(), 1)
+        for provider_id in providers:
+            created = request.created_at + timedelta(seconds=self.random.uniform(0, min(age, 3 * 86400)))
+            if accepted is None:
+                status = 'PENDING'
+            else:
+                status = 'ACCEPTED' if provider_id == accepted else 'REJECTED'
+            yield Response(
+                id=self.uuid(), request_id=request.pk, provider_id=provider_id, status=status,
+                message=self.random.choice(MESSAGES).format(when=self.random.choice(WHEN)),
+                proposed_price=self.price(float(request.price)),
+                created_at=created, updated_at=created,
+            )
+
+    def create_requests(self, count, client_ids, providers_by_service, services, responses_per_request):
+        all_providers = [pk for pks in providers_by_service.values() for pk in pks]
+        made_requests = made_responses = 0
+        for batch in batched(self.requests(count, client_ids, services), self.batch_size):
+            responses = []
+            for request in batch:
+                candidates = providers_by_service.get(request.service_id) or all_providers
+                responses += self.responses(request, candidates, responses_per_request)
+            with transaction.atomic(), explicit_timestamps(Request, Response):
+                Request.objects.bulk_create(batch)
+                Response.objects.bulk_create(responses, batch_size=self.batch_size)
+            made_requests += len(batch)
+            made_responses += len(responses)
+            self.log(f'Requests: {made_requests}/{count}, responses: {made_responses}')
+        return made_requests, made_responses
+
+    def finish(self):
+        """Rebuild what the skipped signals would have maintained."""
+        self.log('Rebuilding dashboard counters')
+        rebuild_counters()
+        self.log('Rebuilding bid summaries')
+        refresh_bid_summaries()
+        self.log('Rebuilding provider inboxes')
+        rebuild_inbox()
+        backend = get_search_backend()
+        if backend is not None:
+            self.log('Rebuilding the search index')
+            backend.rebuild()
+        invalidate_service_catalog()
+
+
+# Object behind ``<pk>`` when the route name does not say (admin_<model>_edit does).
+PK_OBJECT = {'request_reject': 'response'}
+
+
+def route_kwargs(pattern, objects):
+    """
+    URL arguments to request the ``domestique.urls`` entry ``pattern`` with, from ``objects``:
+    rows by kind (``client``, ``provider``, ``request``, ``response``, ``service``...).
+    """
+    kwargs = {}
+    for argument in pattern.pattern.converters:
+        if argument == 'pk':
+            kind = PK_OBJECT.get(pattern.name) or pattern.name.split('_')[1]
+            kwargs['pk'] = objects[kind].pk
+        elif argument == 'request_id':
+            kwargs['request_id'] = objects['request'].pk
+        elif argument == 'provider_id':
+            kwargs['provider_id'] = objects['provider'].pk
+        elif argument == 'name':
+            kwargs['name'] = 'requests'
+    return kwargs
+
+
+def generate(clients=1000, providers=200, admins=1, services=len(SERVICES), requests=10000,
+             responses_per_request=3, seed=None, batch_size=5000, days=180, password=DEFAULT_PASSWORD, log=None):
+    """
+    Add synthetic rows to the database and return the number created per kind. Existing rows
+    are left alone; ``seed`` makes a run reproducible (on an empty database).
+    """
+    generator = Generator(seed=seed, batch_size=batch_size, days=days, password=password, log=log)
+    catalog = generator.create_services(services)
+    client_ids = generator.create_users(Client, clients)
+    provider_ids = generator.create_users(
+        Provider, providers, ('is_approved',), lambda user: (generator.random.random() < 0.9,),
+    )
+    generator.create_users(Admin, admins)
+    by_service = generator.create_skills(provider_ids, list(catalog))
+    made_requests = made_responses = 0
+    if requests and client_ids:
+        made_requests, made_responses = generator.create_requests(
+            requests, client_ids, by_service, catalog, responses_per_request,
+        )
+    generator.finish()
+    return {
+        'services': len(catalog), 'clients': len(client_ids), 'providers': len(provider_ids), 'admins': admins,
+        'requests': made_requests, 'responses': made_responses,
+    }
@@ -0,0 +1,60 @@
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from domestique import counters, events, inbox
+from domestique.models import Request
+
+
+def expire_overdue_requests(batch_size=1000, now=None):
+    """
+    Flip every pending request whose ``task_date`` has passed to ``EXPIRED``.
+
+    Works in batches of ``batch_size`` rows, one ``UPDATE`` per batch, so it can be run
+    from cron or a scheduler. The update re-checks the status, which makes concurrent runs
+    on several nodes safe: each row is counted by exactly one of them. Clients get a
+    ``request.expired`` event for each of their requests.
+    Returns ``(rows_expired, seconds_taken)``.
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            overdue = Request.objects.filter(status='PENDING', task_date__lt=now)
+            if connection.features.has_select_for_update_skip_locked:
+                overdue = overdue.select_for_update(skip_locked=True)
+            batch = dict(overdue.values_list('pk', 'client_id')[:batch_size])
+            if not batch:
+                break
+            deltas = _expiry_counter_deltas(list(batch))
+            expired += Request.objects.filter(pk__in=list(batch), status='PENDING').update(
+                status='EXPIRED', updated_at=now
+            )
+            counters.apply_deltas(deltas)
+            inbox.update_entries(batch, request_status='EXPIRED')
+            events.publish_many((client_id, 'request.expired', {'request': pk}) for pk, client_id in batch.items())
+    return expired, time.monotonic() - started
+
+
+def _expiry_counter_deltas(request_ids):
+    """Dashboard counter deltas for expiring ``request_ids`` (the UPDATE bypasses the receivers)."""
+    deltas = Counter()
+    unread = (
+        counters.unread_responses_queryset()
+        .filter(request_id__in=request_ids, request__status='PENDING')
+        .values_list('request__client_id').annotate(n=Count('pk')).order_by()
+    )
+    for client_id, n in unread:
+        deltas[client_id, 'unread_responses'] -= n
+    accepted = (
+        counters.accepted_requests_queryset()
+        .filter(pk__in=request_ids, status='PENDING')
+        .values_list('accepted_provider_id').annotate(n=Count('pk')).order_by()
+    )
+    for provider_id, n in accepted:
+        deltas[provider_id, 'accepted_requests'] -= n
+    return deltas
@@ -0,0 +1,19 @@
+from django import template
+from django.utils.html import format_html
+
+from domestique.photos import SIZES
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(user, size='medium', css_class=''):
+    """``<picture>`` for a thumbnail of ``user.photo`` (WebP, JPEG fallback) or the placeholder."""
+    edge = SIZES[size]
+    img = format_html(
+        '<img src="{}" alt="{}" width="{}" height="{}" class="{}" loading="lazy">',
+        user.photo_url(size, 'jpg'), user, edge, edge, css_class,
+    )
+    if not user.photo_ready:
+        return img
+    return format_html('<picture><source type="image/webp" srcset="{}">{}</picture>', user.photo_url(size, 'webp'), img)
@@ -0,0 +1,55 @@
+"""
+Failed-login throttling in the cache.
+
+Failures are counted per email and per client IP over a fixed window of
+``LOGIN_FAILURE_WINDOW`` seconds starting at the first failure. Once either count reaches
+its limit, further attempts are refused without checking the password, so a brute-force
+burst costs one cache read per attempt instead of a password hash. A successful login
+clears the email's count.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _digest(value):
+    # Hashed: the submitted username is arbitrary text, and memcached refuses keys with spaces
+    # or over 250 characters.
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _keys(email, ip):
+    keys = {f'login-failures:email:{_digest(email.strip().lower())}': _setting('LOGIN_FAILURE_LIMIT', 5)}
+    if ip:
+        keys[f'login-failures:ip:{_digest(ip)}'] = _setting('LOGIN_FAILURE_IP_LIMIT', 50)
+    return keys
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR') if request is not None else None
+
+
+def is_login_throttled(email, ip):
+    keys = _keys(email, ip)
+    counts = cache.get_many(list(keys))
+    return any(counts.get(key, 0) >= limit for key, limit in keys.items())
+
+
+def record_login_failure(email, ip):
+    window = _setting('LOGIN_FAILURE_WINDOW', 15 * 60)
+    for key in _keys(email, ip):
+        # add() only starts the window on the first failure; incr() keeps its expiry.
+        cache.add(key, 0, window)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, window)
+
+
+def reset_login_failures(email):
+    cache.delete_many(list(_keys(email, None)))
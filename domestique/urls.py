@@ -1,13 +1,14 @@
 from django.urls import path
 from domestique.views import (
     HomeView, RegisterView, LoginView, LogoutView, ClientDashboardView, ProviderDashboardView,
-    RequestCreateView, RequestListView, ResponseCreateView, RequestAcceptView, RequestRejectView,
+    AsyncClientDashboardView, AsyncProviderDashboardView, AsyncRequestListView, EventStreamView,
+    RequestCreateView, RequestListView, MatchingRequestListView, NearbyRequestListView, ResponseCreateView, RequestAcceptView, RequestRejectView,
     AdminClientListView, AdminClientCreateView, AdminClientUpdateView, AdminClientDeleteView,
     AdminProviderListView, AdminProviderCreateView, AdminProviderUpdateView, AdminProviderDeleteView,
     AdminServiceCreateView, AdminServiceListView, AdminServiceUpdateView, AdminServiceDeleteView,
     AdminRequestListView, AdminRequestCreateView, AdminRequestUpdateView, AdminRequestDeleteView,
     AdminResponseListView, AdminResponseCreateView, AdminResponseUpdateView, AdminResponseDeleteView,
-    AdminAdminCreateView, AdminLoginView
+    AdminAdminCreateView, AdminLoginView, AdminExportView, MetricsView
 )
 
 urlpatterns = [
@@ -18,8 +19,14 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('client/dashboard/', ClientDashboardView.as_view(), name='client_dashboard'),
     path('provider/dashboard/', ProviderDashboardView.as_view(), name='provider_dashboard'),
+    path('client/dashboard/async/', AsyncClientDashboardView.as_view(), name='client_dashboard_async'),
+    path('provider/dashboard/async/', AsyncProviderDashboardView.as_view(), name='provider_dashboard_async'),
+    path('events/', EventStreamView.as_view(), name='event_stream'),
     path('request/create/', RequestCreateView.as_view(), name='request_create'),
     path('requests/', RequestListView.as_view(), name='request_list'),
+    path('requests/async/', AsyncRequestListView.as_view(), name='request_list_async'),
+    path('requests/matching/', MatchingRequestListView.as_view(), name='request_matching'),
+    path('requests/nearby/', NearbyRequestListView.as_view(), name='request_nearby'),
     path('request/<uuid:request_id>/respond/', ResponseCreateView.as_view(), name='response_create'),
     path('request/<uuid:request_id>/accept/<uuid:provider_id>/', RequestAcceptView.as_view(), name='request_accept'),
     path('response/<uuid:pk>/reject/', RequestRejectView.as_view(), name='request_reject'),
@@ -47,4 +54,6 @@ urlpatterns = [
     path('admin/response/create/', AdminResponseCreateView.as_view(), name='admin_response_create'),
     path('admin/response/<uuid:pk>/edit/', AdminResponseUpdateView.as_view(), name='admin_response_edit'),
     path('admin/response/<uuid:pk>/delete/', AdminResponseDeleteView.as_view(), name='admin_response_delete'),
+    path('admin/export/<str:name>/', AdminExportView.as_view(), name='admin_export'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -1,23 +1,151 @@
+import asyncio
+import contextvars
+import math
 
-from django.views.generic import FormView, UpdateView, DeleteView, ListView, TemplateView, CreateView
+from asgiref.sync import sync_to_async
+from django.views.generic import FormView, UpdateView, DeleteView, ListView, TemplateView, CreateView, View
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth import login
 from django.urls import reverse_lazy
-from django.shortcuts import redirect
+from django.db.models import Prefetch, Q
+from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from domestique.models import Client, Provider, Admin, Service, Request, Response
-from domestique.forms import UserRegistrationForm, UserLoginForm, ServiceForm
-
-class HomeView(TemplateView):
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import translation
+from domestique.models import Client, Provider, Admin, Service, Request, Response, InboxEntry
+from domestique.forms import UserRegistrationForm, UserLoginForm, ServiceForm, RequestForm, AdminRequestForm, AdminResponseForm
+from domestique.bids import accept_bid, with_bid_stats
+from domestique.catalog import get_service_catalog, get_service_catalog_version
+from domestique.counters import get_dashboard_counter
+from domestique.events import event_stream, streams_events
+from domestique.exports import EXPORTS, FORMATS, aiter_export, iter_export, parse_bound
+from domestique.pagecache import AnonymousPageCacheMixin
+from domestique.pagination import KeysetPaginationMixin, ApproximateCountPaginator
+from domestique.search import search_requests
+from domestique.geo import within_radius
+from domestique.metrics import registry
+from domestique.routers import read_from_replica, routing_state
+
+class HomeView(AnonymousPageCacheMixin, TemplateView):
     template_name = 'domestique/index.html'
 
 class AdminRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_superuser
 
-class RegisterView(FormView):
+async def gather_queries(*funcs, using=DEFAULT_DB_ALIAS):
+    """
+    Call the blocking ORM callables ``funcs`` concurrently and return their results in order.
+
+    The async ORM runs every query on the one thread that owns the request's connection, so
+    gathering ``acount()`` and ``aiterator()`` still runs them back to back. Here each callable
+    gets a worker thread with its own connection, handed back when it returns. That only pays
+    with a connection pool (``OPTIONS['pool']``): without one each worker would open and close
+    a connection of its own, costing more than the overlap saves and bypassing the persistent
+    connections. SQLite serializes connections anyway, and rows written inside an open
+    transaction are invisible to other connections. In all those cases the callables run in
+    turn on the request's connection.
+    """
+    connection = connections[using]
+    pooled = connection.settings_dict.get('OPTIONS', {}).get('pool')
+    if connection.vendor == 'sqlite' or connection.in_atomic_block or not pooled:
+        return [await sync_to_async(func)() for func in funcs]
+
+    language = translation.get_language()
+    restore_routing = routing_state()
+
+    def isolated(func):
+        def run():
+            translation.activate(language)
+            restore_routing()
+            try:
+                return func()
+            finally:
+                connections.close_all()
+        # A fresh context, so the worker does not inherit the request's connection objects.
+        return sync_to_async(lambda: contextvars.Context().run(run), thread_sensitive=False)
+
+    return await asyncio.gather(*(isolated(func)() for func in funcs))
+
+class AsyncLoginRequiredMixin:
+    """
+    Login check for async views. ``request.user`` loads lazily with a blocking query, so the
+    user is fetched with ``auser()`` and stored back before the view runs.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+class ReplicaReadMixin:
+    """
+    Runs GET requests inside ``read_from_replica()`` unless the browser has just written
+    (see ``domestique.routers``). Put it after the login mixins so the user is still loaded
+    from the primary.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or getattr(request, 'prefers_primary', False):
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        with read_from_replica():
+            return await super().dispatch(request, *args, **kwargs)
+
+class AdminListMixin(ReplicaReadMixin):
+    """
+    Paginated admin list with a ``?q=`` prefix search over ``search_fields`` and, when
+    ``status_choices`` is set, an exact ``?status=`` filter.
+    """
+    paginate_by = 50
+    paginator_class = ApproximateCountPaginator
+    search_fields = ()
+    status_choices = None
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_status_filter(self):
+        status = self.request.GET.get('status', '')
+        return status if self.status_choices and status in dict(self.status_choices) else ''
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query = self.get_search_query()
+        if query and self.search_fields:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__istartswith': query})
+            queryset = queryset.filter(condition)
+        status = self.get_status_filter()
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+    def is_filtered(self):
+        return bool(self.get_search_query() or self.get_status_filter())
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return self.paginator_class(queryset, per_page, estimate=not self.is_filtered(), **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.get_search_query()
+        context['status_choices'] = self.status_choices
+        context['status_filter'] = self.get_status_filter()
+        return context
+
+class RegisterView(AnonymousPageCacheMixin, FormView):
     form_class = UserRegistrationForm
     template_name = 'domestique/register.html'
     success_url = None
@@ -72,39 +200,97 @@ class AdminLoginView(LoginView):
 class LogoutView(LoginRequiredMixin, LogoutView):
     next_page = reverse_lazy('login')
 
-class ClientDashboardView(LoginRequiredMixin, ListView):
+class ClientDashboardView(LoginRequiredMixin, ReplicaReadMixin, ListView):
     model = Request
     template_name = 'domestique/client_dashboard.html'
     context_object_name = 'requests'
 
     def get_queryset(self):
-        return Request.objects.filter(client=self.request.user, deleted_at__isnull=True).exclude(status='EXPIRED')
+        # One query for the requests with their bid figures (a client has few requests, so they
+        # are grouped right here) and one prefetch for the responses with their providers;
+        # service names come from the cached catalog and the unread total from the counter row.
+        return with_bid_stats(
+            Request.objects.filter(client=self.request.user)
+            .exclude(status='EXPIRED')
+            .exclude(task_date__lt=timezone.now())
+            .select_related('service')
+            .prefetch_related(Prefetch('responses', queryset=Response.objects.select_related('provider')))
+            .order_by('-created_at')
+        )
+
+    def get_counter(self):
+        return get_dashboard_counter(self.request.user.pk)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['unread_responses'] = Response.objects.filter(
-            request__client=self.request.user, request__deleted_at__isnull=True, status='PENDING'
-        ).count()
+        context['unread_responses'] = self.get_counter().unread_responses
+        context['event_stream'] = streams_events(self.request)
         return context
 
-class ProviderDashboardView(LoginRequiredMixin, ListView):
-    model = Response
+class ProviderDashboardView(LoginRequiredMixin, ReplicaReadMixin, ListView):
+    model = InboxEntry
     template_name = 'domestique/provider_dashboard.html'
     context_object_name = 'responses'
 
     def get_queryset(self):
-        return Response.objects.filter(provider=self.request.user, request__deleted_at__isnull=True).exclude(request__status='EXPIRED')
+        # The provider's inbox rows (see domestique.inbox) carry the request fields shown, so
+        # this reads one table by index; service names come from the cached catalog.
+        return (
+            InboxEntry.objects.filter(provider_id=self.request.user.pk)
+            .exclude(request_status='EXPIRED')
+            .exclude(task_date__lt=timezone.now())
+            .order_by('-created_at')
+        )
+
+    def get_counter(self):
+        return get_dashboard_counter(self.request.user.pk)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['accepted_requests'] = Request.objects.filter(
-            accepted_provider=self.request.user, deleted_at__isnull=True
-        ).exclude(status='EXPIRED').count()
+        context['accepted_requests'] = self.get_counter().accepted_requests
+        context['event_stream'] = streams_events(self.request)
         return context
 
+class AsyncDashboardMixin(AsyncLoginRequiredMixin):
+    """Async ``get`` for the dashboards: the list and the counter row are fetched concurrently."""
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        self.object_list, self.counter = await gather_queries(
+            lambda: list(queryset),
+            lambda: get_dashboard_counter(request.user.pk),
+        )
+        return self.render_to_response(self.get_context_data())
+
+    def get_counter(self):
+        return self.counter
+
+class AsyncClientDashboardView(AsyncDashboardMixin, ClientDashboardView):
+    pass
+
+class AsyncProviderDashboardView(AsyncDashboardMixin, ProviderDashboardView):
+    pass
+
+class EventStreamView(AsyncLoginRequiredMixin, View):
+    """
+    Server-Sent Events for the signed-in user (see ``domestique.events``). Under WSGI the
+    stream could never be flushed, so it answers 204 and the browser stops reconnecting.
+    """
+    async def get(self, request, *args, **kwargs):
+        if not streams_events(request):
+            return HttpResponse(status=204)
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return HttpResponseBadRequest(_('Invalid event id.'))
+        response = StreamingHttpResponse(event_stream(request.user.pk, last_event_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
 class RequestCreateView(LoginRequiredMixin, CreateView):
     model = Request
-    fields = ['service', 'description', 'location', 'price', 'task_date']
+    form_class = RequestForm
     template_name = 'domestique/request_create.html'
     success_url = reverse_lazy('client_dashboard')
 
@@ -112,13 +298,104 @@ class RequestCreateView(LoginRequiredMixin, CreateView):
         form.instance.client = Client.objects.get(pk=self.request.user.pk)  
         return super().form_valid(form)
 
-class RequestListView(LoginRequiredMixin, ListView):
+class RequestListView(LoginRequiredMixin, ReplicaReadMixin, KeysetPaginationMixin, ListView):
     model = Request
     template_name = 'domestique/request_list.html'
     context_object_name = 'requests'
 
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_base_queryset(self):
+        return Request.objects.filter(status='PENDING').select_related('service')
+
+    def get_queryset(self):
+        query = self.get_search_query()
+        if query:
+            return search_requests(query, self.get_base_queryset())
+        return self.get_base_queryset()
+
+    def paginate_queryset(self, queryset, page_size):
+        # Search results are ordered by rank, so they page by number instead of by cursor.
+        if self.get_search_query():
+            return ListView.paginate_queryset(self, queryset, page_size)
+        return super().paginate_queryset(queryset, page_size)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.get_search_query()
+        # Part of the request card cache keys; called when the template renders.
+        context['catalog_version'] = get_service_catalog_version
+        return context
+
+class AsyncRequestListView(AsyncLoginRequiredMixin, RequestListView):
+    """
+    ``RequestListView`` on the async ORM. Searches still run synchronously in a worker
+    thread: the full-text backends issue raw SQL through a blocking cursor.
+    """
+    page = None
+
+    async def get(self, request, *args, **kwargs):
+        if self.get_search_query():
+            return await sync_to_async(super().get)(request, *args, **kwargs)
+        self.object_list = self.get_queryset()
+        self.page = await self.apaginate_queryset(self.object_list, self.get_paginate_by(self.object_list))
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.page if self.page is not None else super().paginate_queryset(queryset, page_size)
+
+class MatchingRequestListView(RequestListView):
+    extra_context = {'matching': True}
+
+    def get_base_queryset(self):
+        skill_ids = Provider.cached_skill_ids(self.request.user.pk)
+        return super().get_base_queryset().filter(service_id__in=skill_ids)
+
+class NearbyRequestListView(LoginRequiredMixin, ReplicaReadMixin, ListView):
+    """
+    Pending requests within ``?radius=`` km (default 10) of ``?lat=``/``?lon=``, or of the
+    signed-in user's geocoded address, nearest first.
+    """
+    template_name = 'domestique/request_list.html'
+    context_object_name = 'requests'
+    paginate_by = 20
+    default_radius = 10
+    max_radius = 200
+    extra_context = {'nearby': True}
+
+    def get_origin(self):
+        try:
+            latitude, longitude = float(self.request.GET['lat']), float(self.request.GET['lon'])
+        except (KeyError, ValueError):
+            latitude = longitude = math.nan
+        # float() accepts "nan" and "inf", which the grid cell arithmetic cannot take.
+        if math.isfinite(latitude) and math.isfinite(longitude) and abs(latitude) <= 90 and abs(longitude) <= 180:
+            return latitude, longitude
+        user = self.request.user
+        return (user.latitude, user.longitude) if user.latitude is not None else None
+
+    def get_radius(self):
+        try:
+            radius = float(self.request.GET.get('radius', self.default_radius))
+        except ValueError:
+            radius = self.default_radius
+        if not math.isfinite(radius):
+            radius = self.default_radius
+        return min(max(radius, 0), self.max_radius)
+
     def get_queryset(self):
-        return Request.objects.filter(status='PENDING', deleted_at__isnull=True).exclude(status='EXPIRED')
+        origin = self.get_origin()
+        if origin is None:
+            return []
+        queryset = Request.objects.filter(status='PENDING').select_related('service')
+        return within_radius(queryset, *origin, self.get_radius())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['radius'] = self.get_radius()
+        context['catalog_version'] = get_service_catalog_version
+        return context
 
 class ResponseCreateView(LoginRequiredMixin, CreateView):
     model = Response
@@ -128,7 +405,7 @@ class ResponseCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.provider = Provider.objects.get(pk=self.request.user.pk)
-        form.instance.request = Request.objects.get(id=self.kwargs['request_id'])
+        form.instance.request = get_object_or_404(Request, id=self.kwargs['request_id'])
         return super().form_valid(form)
 
 class RequestAcceptView(LoginRequiredMixin, UpdateView):
@@ -138,29 +415,34 @@ class RequestAcceptView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('client_dashboard')
     pk_url_kwarg = 'request_id'
 
+    def get_queryset(self):
+        return Request.objects.filter(client_id=self.request.user.pk)
+
     def form_valid(self, form):
-        form.instance.accepted_provider = Provider.objects.get(id=self.kwargs['provider_id'])
-        form.instance.status = 'ACCEPTED'
-        response = Response.objects.get(request=form.instance, provider=form.instance.accepted_provider)
-        response.status = 'ACCEPTED'
-        response.save()
-        return super().form_valid(form)
+        # Locks the request and settles every bid on it at once. A second submit (or a
+        # concurrent one) finds the request accepted already and just goes back.
+        accept_bid(self.object.pk, self.kwargs['provider_id'], client_id=self.request.user.pk)
+        return redirect(self.get_success_url())
 
 class RequestRejectView(LoginRequiredMixin, UpdateView):
     model = Response
     fields = []
     template_name = 'domestique/request_reject.html'
     success_url = reverse_lazy('client_dashboard')
-    pk_url_kwarg = 'request_id'
+
+    def get_queryset(self):
+        return Response.objects.filter(request__client_id=self.request.user.pk)
 
     def form_valid(self, form):
         form.instance.status = 'REJECTED'
         return super().form_valid(form)
 
-class AdminClientListView(AdminRequiredMixin, ListView):
+class AdminClientListView(AdminRequiredMixin, AdminListMixin, ListView):
     model = Client
     template_name = 'domestique/admin/client_list.html'
     context_object_name = 'clients'
+    search_fields = ('last_name', 'first_name', 'email')
+    ordering = ('last_name', 'first_name', 'pk')
 
 class AdminClientCreateView(AdminRequiredMixin, CreateView):
     model = Client
@@ -192,10 +474,12 @@ class AdminClientDeleteView(AdminRequiredMixin, DeleteView):
         self.object.soft_delete()
         return redirect(self.success_url)
 
-class AdminProviderListView(AdminRequiredMixin, ListView):
+class AdminProviderListView(AdminRequiredMixin, AdminListMixin, ListView):
     model = Provider
     template_name = 'domestique/admin/provider_list.html'
     context_object_name = 'providers'
+    search_fields = ('last_name', 'first_name', 'email')
+    ordering = ('last_name', 'first_name', 'pk')
 
 class AdminProviderCreateView(AdminRequiredMixin, CreateView):
     model = Provider
@@ -238,6 +522,9 @@ class AdminServiceListView(AdminRequiredMixin, ListView):
     template_name = 'domestique/admin/service_list.html'
     context_object_name = 'services'
 
+    def get_queryset(self):
+        return list(get_service_catalog().values())
+
 class AdminServiceUpdateView(AdminRequiredMixin, UpdateView):
     model = Service
     form_class = ServiceForm
@@ -254,20 +541,72 @@ class AdminServiceDeleteView(AdminRequiredMixin, DeleteView):
         self.object.soft_delete()
         return redirect(self.success_url)
 
-class AdminRequestListView(AdminRequiredMixin, ListView):
-    model = Request
+class AdminRequestListView(AdminRequiredMixin, AdminListMixin, ListView):
+    """
+    Besides the usual filters, ``?sort=`` orders by number of bids or lowest bid and
+    ``?max_bids=`` keeps requests with at most that many; both are scans of an index of the
+    ``BidSummary`` table (see ``domestique.bids``). Each sort filters on its summary column,
+    which makes the join an inner one the database can drive from that index; sorting by
+    lowest bid leaves out the requests without bids.
+    """
+    queryset = Request.objects.select_related('client', 'service', 'bid_summary')
     template_name = 'domestique/admin/request_list.html'
     context_object_name = 'requests'
+    search_fields = ('client__last_name', 'client__first_name', 'client__email')
+    status_choices = Request.STATUS_CHOICES
+    ordering = ('-created_at', '-pk')
+    # (value, label, filter, ordering, whether the filter leaves rows out)
+    sort_choices = (
+        ('fewest_bids', _('Fewest bids'),
+         Q(bid_summary__bid_count__gte=0), ('bid_summary__bid_count', 'bid_summary__request'), False),
+        ('lowest_bid', _('Lowest bid'),
+         Q(bid_summary__lowest_bid__isnull=False), ('bid_summary__lowest_bid', 'bid_summary__request'), True),
+    )
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort', '')
+        return next((choice for choice in self.sort_choices if choice[0] == sort), None)
+
+    def get_max_bids(self):
+        value = self.request.GET.get('max_bids', '')
+        # isdigit() alone also accepts characters like '²', which int() rejects.
+        return int(value) if value.isascii() and value.isdigit() else None
+
+    def is_filtered(self):
+        sort = self.get_sort()
+        return super().is_filtered() or self.get_max_bids() is not None or bool(sort and sort[4])
+
+    def get_ordering(self):
+        sort = self.get_sort()
+        return sort[3] if sort else self.ordering
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sort = self.get_sort()
+        if sort:
+            queryset = queryset.filter(sort[2])
+        max_bids = self.get_max_bids()
+        if max_bids is not None:
+            queryset = queryset.filter(bid_summary__bid_count__lte=max_bids)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        sort = self.get_sort()
+        context['sort_choices'] = [choice[:2] for choice in self.sort_choices]
+        context['sort'] = sort[0] if sort else ''
+        context['max_bids'] = self.get_max_bids()
+        return context
 
 class AdminRequestCreateView(AdminRequiredMixin, CreateView):
     model = Request
-    fields = ['client', 'service', 'description', 'location', 'price', 'status', 'accepted_provider', 'task_date']
+    form_class = AdminRequestForm
     template_name = 'domestique/admin/request_form.html'
     success_url = reverse_lazy('admin_request_list')
 
 class AdminRequestUpdateView(AdminRequiredMixin, UpdateView):
     model = Request
-    fields = ['client', 'service', 'description', 'location', 'price', 'status', 'accepted_provider', 'task_date']
+    form_class = AdminRequestForm
     template_name = 'domestique/admin/request_form.html'
     success_url = reverse_lazy('admin_request_list')
 
@@ -281,20 +620,23 @@ class AdminRequestDeleteView(AdminRequiredMixin, DeleteView):
         self.object.soft_delete()
         return redirect(self.success_url)
 
-class AdminResponseListView(AdminRequiredMixin, ListView):
-    model = Response
+class AdminResponseListView(AdminRequiredMixin, AdminListMixin, ListView):
+    queryset = Response.objects.select_related('provider', 'request__client', 'request__service')
     template_name = 'domestique/admin/response_list.html'
     context_object_name = 'responses'
+    search_fields = ('provider__last_name', 'provider__first_name', 'provider__email')
+    status_choices = Response.STATUS_CHOICES
+    ordering = ('-created_at', '-pk')
 
 class AdminResponseCreateView(AdminRequiredMixin, CreateView):
     model = Response
-    fields = ['request', 'provider', 'message', 'proposed_price']
+    form_class = AdminResponseForm
     template_name = 'domestique/admin/response_form.html'
     success_url = reverse_lazy('admin_response_list')
 
 class AdminResponseUpdateView(AdminRequiredMixin, UpdateView):
     model = Response
-    fields = ['request', 'provider', 'message', 'proposed_price']
+    form_class = AdminResponseForm
     template_name = 'domestique/admin/response_form.html'
     success_url = reverse_lazy('admin_response_list')
 
@@ -306,4 +648,36 @@ class AdminResponseDeleteView(AdminRequiredMixin, DeleteView):
     def delete(self, request, *args, **kwargs):
         self.object = self.get_object()
         self.object.soft_delete()
-        return redirect(self.success_url)
\ No newline at end of file
+        return redirect(self.success_url)
+
+class AdminExportView(AdminRequiredMixin, View):
+    content_types = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+
+    def get(self, request, name):
+        if name not in EXPORTS:
+            raise Http404
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest(_('Unknown export format.'))
+        try:
+            since = parse_bound(request.GET['since']) if request.GET.get('since') else None
+            until = parse_bound(request.GET['until']) if request.GET.get('until') else None
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+
+        # Under ASGI, Django reads a sync iterator to the end before sending anything.
+        iterate = aiter_export if isinstance(request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            iterate(name, fmt, status=request.GET.get('status'), since=since, until=until),
+            content_type=self.content_types[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+        return response
+
+class MetricsView(UserPassesTestMixin, View):
+    """This process's request histograms (``domestique.metrics``) for Prometheus. Staff only."""
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')